@@ -8,6 +8,26 @@ namespace Expecto.Editor
     public static class PythonRunner
     {
         const string LogPrefix = "[PythonRunner] ";
+        const string CancelFileName = "DrawioUpdater.cancel";
+        // Скільки чекати завершення скрипта після скасування, перш ніж зупинити процес примусово
+        const int CancelTimeoutMs = 10000;
+        // Код завершення generate_uml.py, якщо оновлення скасовано
+        const int CancelledExitCode = 2;
+
+        // Фази оновлення одного файлу у порядку виконання (для смуги прогресу)
+        static readonly string[] Phases = { "parse", "open", "associations", "update", "serialize", "save", "export" };
+
+        // Подія прогресу з --progress jsonl
+        [System.Serializable]
+        class ProgressEvent
+        {
+            public string @event;
+            public string file;
+            public string phase;
+            public int index;
+            public int files;
+            public float elapsed;
+        }
 
         public static bool LoadSettings(out CodeAnalyzerSettings codeAnalyzerSettings, out UMLSettings umlSettings)
         {
@@ -38,12 +58,85 @@ namespace Expecto.Editor
             {
                 arguments += $" --cleanup-arrows";
             }
+            if (umlSettings.timeBudget > 0)
+            {
+                arguments += $" --time-budget {umlSettings.timeBudget.ToString(System.Globalization.CultureInfo.InvariantCulture)}";
+            }
+            if (umlSettings.renderJobs != 1)
+            {
+                arguments += $" --render-jobs {umlSettings.renderJobs}";
+            }
+            if (umlSettings.tooltipMaxChars > 0)
+            {
+                arguments += $" --tooltip-max-chars {umlSettings.tooltipMaxChars}";
+            }
+            if (umlSettings.tooltipMaxItemChars > 0)
+            {
+                arguments += $" --tooltip-max-item-chars {umlSettings.tooltipMaxItemChars}";
+            }
+            if (umlSettings.compactTooltips)
+            {
+                arguments += $" --compact-tooltips";
+            }
+            if (umlSettings.tooltipsChangedOnly)
+            {
+                arguments += $" --tooltips-changed-only";
+            }
+            if (umlSettings.summarizeOver > 0)
+            {
+                arguments += $" --summarize-over {umlSettings.summarizeOver} --summary-top {umlSettings.summaryTop}";
+                if (umlSettings.summaryPublicOnly)
+                {
+                    arguments += $" --summary-public";
+                }
+            }
+            if (umlSettings.exportJsonGraph || umlSettings.exportPlantUml)
+            {
+                arguments += " --sink drawio";
+                if (umlSettings.exportJsonGraph)
+                {
+                    arguments += " --sink json";
+                }
+                if (umlSettings.exportPlantUml)
+                {
+                    arguments += " --sink plantuml";
+                }
+            }
+            arguments += GetPatternArguments("--include", umlSettings.includeClasses);
+            arguments += GetPatternArguments("--exclude", umlSettings.excludeClasses);
+            arguments += GetPatternArguments("--include-files", umlSettings.includeFiles);
+            arguments += GetPatternArguments("--exclude-files", umlSettings.excludeFiles);
+            return arguments;
+        }
+
+        static string GetPatternArguments(string option, string[] patterns)
+        {
+            string arguments = "";
+            if (patterns == null)
+            {
+                return arguments;
+            }
+            foreach (string pattern in patterns)
+            {
+                if (!string.IsNullOrWhiteSpace(pattern))
+                {
+                    arguments += $" {option} \"{pattern}\"";
+                }
+            }
             return arguments;
         }
 
         public static void RunPythonScript(CodeAnalyzerSettings codeAnalyzerSettings, UMLSettings umlSettings)
         {
+            // Файл скасування: скрипт зупиняється між фазами, щойно він з'являється
+            string cancelFile = Path.GetFullPath(Path.Combine(Application.dataPath, "..", "Temp", CancelFileName));
+            if (File.Exists(cancelFile))
+            {
+                File.Delete(cancelFile);
+            }
+
             string arguments = GetArguments(codeAnalyzerSettings, umlSettings);
+            arguments += $" --progress jsonl --cancel-file \"{cancelFile}\"";
 
             Debug.Log(LogPrefix + "Running Python script with arguments: " + arguments);
             System.Diagnostics.ProcessStartInfo start = new System.Diagnostics.ProcessStartInfo();
@@ -71,11 +164,31 @@ namespace Expecto.Editor
 
             StringBuilder output = new StringBuilder();
             StringBuilder error = new StringBuilder();
+            object progressLock = new object();
+            ProgressEvent lastProgress = null;
 
             process.OutputDataReceived += (sender, e) =>
             {
-                if (!string.IsNullOrEmpty(e.Data))
-                    output.AppendLine(e.Data);
+                if (string.IsNullOrEmpty(e.Data))
+                    return;
+
+                // Рядки JSON - події прогресу, решта - звичайний вивід скрипта
+                if (e.Data.StartsWith("{"))
+                {
+                    try
+                    {
+                        ProgressEvent progress = JsonUtility.FromJson<ProgressEvent>(e.Data);
+                        lock (progressLock)
+                        {
+                            lastProgress = progress;
+                        }
+                        return;
+                    }
+                    catch (System.ArgumentException)
+                    {
+                    }
+                }
+                output.AppendLine(e.Data);
             };
 
             process.ErrorDataReceived += (sender, e) =>
@@ -88,15 +201,88 @@ namespace Expecto.Editor
             process.BeginOutputReadLine();
             process.BeginErrorReadLine();
 
-            process.WaitForExit();
+            bool cancelRequested = false;
+            System.Diagnostics.Stopwatch cancelStopwatch = new System.Diagnostics.Stopwatch();
+            try
+            {
+                while (!process.WaitForExit(100))
+                {
+                    ProgressEvent progress;
+                    lock (progressLock)
+                    {
+                        progress = lastProgress;
+                    }
+
+                    GetProgressInfo(progress, out string info, out float fraction);
+                    if (cancelRequested)
+                    {
+                        info = "Cancelling... " + info;
+                    }
+
+                    if (EditorUtility.DisplayCancelableProgressBar("Drawio Diagram", info, fraction) && !cancelRequested)
+                    {
+                        cancelRequested = true;
+                        File.WriteAllText(cancelFile, "");
+                        cancelStopwatch.Start();
+                    }
+
+                    if (cancelRequested && cancelStopwatch.ElapsedMilliseconds > CancelTimeoutMs)
+                    {
+                        // Діаграми записуються атомарно, тому навіть примусова зупинка не залишить частково записаного файлу
+                        Debug.LogWarning(LogPrefix + "Python script did not stop in time, killing the process");
+                        process.Kill();
+                        break;
+                    }
+                }
+
+                // Чекаємо, поки буде прочитано весь вивід
+                process.WaitForExit();
+            }
+            finally
+            {
+                EditorUtility.ClearProgressBar();
+                if (File.Exists(cancelFile))
+                {
+                    File.Delete(cancelFile);
+                }
+            }
 
             Debug.Log(LogPrefix + "Python script output: " + output.ToString());
+            if (cancelRequested || process.ExitCode == CancelledExitCode)
+            {
+                Debug.LogWarning(LogPrefix + "Diagram update was cancelled");
+            }
             if (error.Length > 0)
             {
                 Debug.LogError(LogPrefix + "Python script error: " + error.ToString());
             }
         }
 
+        static void GetProgressInfo(ProgressEvent progress, out string info, out float fraction)
+        {
+            info = "Starting...";
+            fraction = 0f;
+            if (progress == null || progress.files <= 0)
+            {
+                return;
+            }
+
+            // Частка поточного файлу за кількістю завершених фаз
+            float fileProgress = 0f;
+            if (progress.@event == "phase")
+            {
+                fileProgress = Mathf.Max(0, System.Array.IndexOf(Phases, progress.phase) + 1) / (float)Phases.Length;
+            }
+            else if (progress.@event == "file_done" || progress.@event == "done")
+            {
+                fileProgress = 1f;
+            }
+
+            int index = progress.@event == "done" ? progress.files - 1 : progress.index;
+            fraction = Mathf.Clamp01((index + fileProgress) / progress.files);
+            info = $"{progress.file} ({index + 1}/{progress.files}) {progress.phase} - {progress.elapsed:F1} s";
+        }
+
         public static T GetSettings<T>(string filter) where T : ScriptableObject
         {
             var settings = AssetDatabase.FindAssets(filter);
@@ -27,6 +27,59 @@ namespace Expecto
         [Tooltip("Automatically clean up arrows for classes")]
         public bool cleanupArrows = true;
 
+        [Tooltip("Time budget for one run in seconds (0 - no limit). Most recently changed files are updated first, skipped files go first next time")]
+        public float timeBudget = 0;
+
+        [Tooltip("Processes that compute labels and sizes of classes on large pages (1 - none, 0 - all cores)")]
+        public int renderJobs = 1;
+
+        [Header("Tooltip Settings")]
+
+        [Tooltip("Maximum characters of a tooltip per field or method (0 - no limit). Sections other than Purpose and Params are dropped first")]
+        public int tooltipMaxChars = 0;
+
+        [Tooltip("Maximum characters of the tooltip of a whole fields or methods block (0 - no limit)")]
+        public int tooltipMaxItemChars = 0;
+
+        [Tooltip("Use shorter indentation markup in tooltips to reduce diagram size")]
+        public bool compactTooltips = false;
+
+        [Tooltip("Build tooltips only for new and changed fields and methods; unchanged ones keep the tooltip already on the diagram")]
+        public bool tooltipsChangedOnly = false;
+
+        [Header("Large Classes")]
+
+        [Tooltip("Summarize classes with more fields and methods than this (0 - no limit). The full member list moves to the tooltip")]
+        public int summarizeOver = 0;
+
+        [Tooltip("How many fields and how many methods a summarized class shows")]
+        public int summaryTop = 10;
+
+        [Tooltip("Show only public members in a summarized class")]
+        public bool summaryPublicOnly = false;
+
+        [Header("Extra Outputs")]
+
+        [Tooltip("Also write a JSON graph of classes, members and relations next to each diagram")]
+        public bool exportJsonGraph = false;
+
+        [Tooltip("Also write a PlantUML class diagram next to each diagram")]
+        public bool exportPlantUml = false;
+
+        [Header("Filters")]
+
+        [Tooltip("Only classes whose name (short or with namespace) matches one of these patterns. Glob, or a regular expression with the re: prefix")]
+        public string[] includeClasses = new string[0];
+
+        [Tooltip("Skip classes whose name matches one of these patterns. Fields of skipped types do not create associations")]
+        public string[] excludeClasses = new string[0];
+
+        [Tooltip("Only input XML files whose name matches one of these patterns")]
+        public string[] includeFiles = new string[0];
+
+        [Tooltip("Skip input XML files whose name matches one of these patterns")]
+        public string[] excludeFiles = new string[0];
+
         string GetCrossPlatformPath(string path)
         {
             // Нормалізуємо шлях для поточної ОС
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Тести лежать у теці з "~", яку Unity не імпортує; модулі скрипта - на рівень вище
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from run_state import STATE_DIR_ENV
+
+
+@pytest.fixture(autouse=True)
+def state_dir(tmp_path, monkeypatch):
+    """Стан запусків - у тимчасовій папці тесту, а не в кеші користувача."""
+    monkeypatch.setenv(STATE_DIR_ENV, str(tmp_path / "state"))
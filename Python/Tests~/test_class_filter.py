@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+import os
+
+from generate_uml import UpdateOptions, collect_xml_files, load_class_data, parse_xml_to_class_data, update_diagrams
+from golden_harness import base_classes, class_xml
+from name_filter import NameFilter
+from run_state import RunState
+
+
+NESTED_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<Namespace n="Game">
+  <Namespace n="AI">
+    <Class n="Brain" c="Purpose: thinks">
+      <Fields><Field v="- target: Enemy" c="Purpose: whom to chase" /></Fields>
+      <Class n="Memory"><Methods><Method v="+ Forget(): void" /></Methods></Class>
+      <Methods><Method v="+ Think(): void" c="Purpose: decide" /></Methods>
+    </Class>
+  </Namespace>
+  <Namespace>
+    <Class n="Enemy&lt;T&gt;" b="Brain"><Fields><Field v="- brain: Brain" /></Fields></Class>
+  </Namespace>
+</Namespace>
+"""
+
+
+def test_parse_keeps_document_order_and_own_members():
+    """Класи - у порядку документа, члени вкладеного класу не потрапляють до зовнішнього."""
+    class_data_list = parse_xml_to_class_data(io.BytesIO(NESTED_XML))
+
+    assert [class_data.name for class_data in class_data_list] == ["Brain", "Memory", "Enemy&lt;T&gt;"]
+    brain, memory, enemy = class_data_list
+    assert [field for field, _, _ in brain.field_items] == ["- target: Enemy"]
+    assert [method for method, _ in brain.method_items] == ["+ Think(): void"]
+    assert [method for method, _ in memory.method_items] == ["+ Forget(): void"]
+    assert enemy.base_class == "Brain"
+
+
+def test_filter_matches_namespaced_names_while_parsing():
+    """Фільтр бачить повне ім'я з простором імен; відфільтровані класи стають зовнішніми іменами."""
+    external_names = set()
+    class_data_list = parse_xml_to_class_data(io.BytesIO(NESTED_XML), NameFilter(exclude=["Game.AI.*"]), external_names)
+
+    assert [class_data.name for class_data in class_data_list] == ["Enemy&lt;T&gt;"]
+    assert external_names == {"Brain"}
+
+
+def test_parse_failure_differs_from_filtered_file():
+    """Помилка розбору дає None, а повністю відфільтрований файл - порожній список."""
+    assert parse_xml_to_class_data(io.BytesIO(b"<Namespace><Class")) is None
+    assert parse_xml_to_class_data(io.BytesIO(NESTED_XML), NameFilter(["Nope*"])) == []
+
+
+def test_fully_filtered_file_succeeds_without_diagram(tmp_path):
+    """Файл, з якого відфільтровано всі класи, обробляється успішно, без діаграми, і наступний запуск нічого не робить."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    xml_path = input_dir / "Plugin.xml"
+    xml_path.write_text(class_xml(base_classes()), encoding='utf-8')
+    options = UpdateOptions(verbose=False, class_filter=NameFilter(["Nope*"]))
+
+    results = update_diagrams(str(input_dir), str(output_dir), options)
+
+    assert [(result.success, result.error, result.class_count) for result in results] == [(True, None, 0)]
+    assert os.listdir(output_dir) == []
+    assert RunState.load(str(output_dir)).is_up_to_date(collect_xml_files(str(input_dir)), options.output_key())
+    # Розібрана порожня модель кешується
+    assert load_class_data(str(xml_path), class_filter=options.class_filter) is load_class_data(str(xml_path), class_filter=options.class_filter)
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import logging
+
+from class_data import ClassData
+from diagram_manager import DiagramManager
+from edge_store import EDGE_EXTENDS
+
+
+def make_class(name, base_class=None, fields=()):
+    class_data = ClassData(name, base_class, "")
+    for field in fields:
+        class_data.append_field(field, None)
+    return class_data
+
+
+def test_arrows_without_index_edges(tmp_path):
+    """set_association і set_extends працюють і без явного index_edges."""
+    manager = DiagramManager(logging.getLogger("test"), verbose=False)
+    assert manager.open_diagram_or_create(str(tmp_path / "Test.drawio"))
+
+    base = make_class("Base")
+    player = make_class("Player", "Base", ["- weapon: Weapon"])
+    weapon = make_class("Weapon")
+    for class_data in (base, player, weapon):
+        manager.set_data_in_class(class_data)
+
+    manager.set_association(player, weapon)
+    manager.set_extends(base, player)
+
+    assert manager.find_arrow(player, weapon) is not None
+    assert manager.find_arrow(player, base, EDGE_EXTENDS) is not None
+    assert manager.arrows_added == ["Player -> Weapon", "Player -> Base"]
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import generate_uml
+from generate_uml import UpdateOptions, collect_xml_files, update_diagrams
+from golden_harness import base_classes, class_xml
+from run_state import LEGACY_STATE_FILE_NAME, RunState, get_state_path
+
+
+def test_generator_revision_invalidates_no_op(tmp_path, monkeypatch):
+    """Після оновлення генератора незмінені діаграми оновлюються знову."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    (input_dir / "Game.xml").write_text(class_xml(base_classes()), encoding='utf-8')
+    options = UpdateOptions()
+    update_diagrams(str(input_dir), str(output_dir), options)
+    xml_files = collect_xml_files(str(input_dir))
+
+    assert RunState.load(str(output_dir)).is_up_to_date(xml_files, options.output_key())
+
+    monkeypatch.setattr(generate_uml, "GENERATOR_REVISION", generate_uml.GENERATOR_REVISION + 1)
+    assert not RunState.load(str(output_dir)).is_up_to_date(xml_files, options.output_key())
+
+
+def test_state_is_kept_outside_the_output_folder(tmp_path):
+    """Стан не пишеться у вихідну папку; старий файл стану з неї переноситься і видаляється."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    output_dir.mkdir()
+    (input_dir / "Game.xml").write_text(class_xml(base_classes()), encoding='utf-8')
+    (output_dir / LEGACY_STATE_FILE_NAME).write_text('{"version": 1, "files": {"Game.xml": {"pending": true}}}', encoding='utf-8')
+
+    assert RunState.load(str(output_dir)).files['Game.xml']['pending']
+    update_diagrams(str(input_dir), str(output_dir), UpdateOptions(verbose=False))
+
+    assert sorted(os.listdir(output_dir)) == ["Game.drawio"]
+    state = RunState.load(str(output_dir))
+    assert os.path.exists(get_state_path(str(output_dir)))
+    assert not state.files['Game.xml']['pending']
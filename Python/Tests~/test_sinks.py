@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+
+from generate_uml import UpdateOptions, update_diagrams
+from golden_harness import base_classes, class_xml
+
+
+def test_json_field_names_without_tooltip(tmp_path):
+    """Ім'я поля в JSON є і для полів без підказки."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    (input_dir / "Game.xml").write_text(class_xml(base_classes()), encoding='utf-8')
+    update_diagrams(str(input_dir), str(output_dir), UpdateOptions(sinks=("json",)))
+
+    graph = json.loads((output_dir / "Game.json").read_text(encoding='utf-8'))
+    fields = {class_json['name']: class_json['fields'] for class_json in graph['classes']}
+    assert fields['Player'] == [
+        {'value': "- inventory: Inventory", 'name': "inventory", 'tooltip': "Purpose: items"},
+        {'value': "- target: Enemy", 'name': "target", 'tooltip': None},
+        {'value': "- allies: List<Player>", 'name': "allies", 'tooltip': None},
+    ]
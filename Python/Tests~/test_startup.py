@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from benchmark import NOOP_STARTUP_MS, run_startup_check
+
+
+# Вимірювання часу залежить від машини, тому вмикається лише явно: DRAWIO_UPDATER_TIMING_TESTS=1
+TIMING_TESTS = os.environ.get("DRAWIO_UPDATER_TIMING_TESTS") == "1"
+# Запас над ціллю NOOP_STARTUP_MS на повільніші та завантажені машини (CI, антивірус у Windows)
+STARTUP_MARGIN = 1.3
+RUNS = 15
+
+
+def test_no_op_run_skips_heavy_imports():
+    """Запуск CLI без змін не імпортує модулі діаграм, logging та typing (за -X importtime)."""
+    modules = run_startup_check(class_count=20, runs=0)['modules']
+
+    for name in ('diagram_manager', 'class_data', 'style_cache', 'logging', 'typing', 'xml.etree.ElementTree'):
+        assert name not in modules
+
+
+@pytest.mark.skipif(not TIMING_TESTS, reason="вимірювання часу вмикає DRAWIO_UPDATER_TIMING_TESTS=1")
+def test_no_op_run_is_fast():
+    """Весь повторний запуск CLI без змін (найшвидший із кількох) вкладається в ціль із запасом."""
+    result = run_startup_check(class_count=200, runs=RUNS)
+
+    assert result['run_ms'] < NOOP_STARTUP_MS * STARTUP_MARGIN, result
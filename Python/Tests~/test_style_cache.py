@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from style_cache import STYLE_CACHE_SIZE, CellKind, intern_style, parse_style, style_kind
+
+
+def test_cache_is_bounded():
+    """Кеш стилів не росте разом з кількістю різних стилів у процесі."""
+    for index in range(STYLE_CACHE_SIZE * 2):
+        style = intern_style(f"curved=1;endArrow=classic;html=1;strokeColor=#{index:06x};")
+        assert style_kind(style) is CellKind.ASSOCIATION
+    assert parse_style.cache_info().currsize <= STYLE_CACHE_SIZE
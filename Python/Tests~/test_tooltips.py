@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import re
+import xml.etree.ElementTree as ET
+
+from generate_uml import UpdateOptions, update_diagrams
+from golden_harness import base_classes, class_xml, with_changes
+
+
+def write_input(path, classes):
+    path.write_text(class_xml(classes), encoding='utf-8')
+
+
+def run(input_dir, output_dir, **options):
+    results = update_diagrams(str(input_dir), str(output_dir), UpdateOptions(tooltips_changed_only=True, **options))
+    assert all(result.success for result in results)
+    return (output_dir / "Game.drawio").read_text(encoding='utf-8')
+
+
+def tooltips(diagram : str) -> list[str]:
+    return re.findall(r'tooltip="[^"]*"', diagram)
+
+
+def test_changed_only_keeps_tooltips_of_unchanged_members(tmp_path):
+    """Другий запуск не втрачає підказки незмінних членів."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    write_input(input_dir / "Game.xml", base_classes())
+
+    first = run(input_dir, output_dir)
+    second = run(input_dir, output_dir)
+
+    assert tooltips(second) == tooltips(first)
+    assert "&lt;b&gt;id&lt;/b&gt;: " in second
+    assert "&lt;b&gt;+ Tick(dt: float): void&lt;/b&gt;" in second
+
+
+def test_changed_only_builds_new_members_only(tmp_path):
+    """Новий член отримує підказку з поточними параметрами, незмінні зберігають попередній текст."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    classes = base_classes()
+    write_input(input_dir / "Game.xml", classes)
+    run(input_dir, output_dir)
+
+    entity = classes[0]
+    write_input(input_dir / "Game.xml", with_changes(classes, Entity={
+        'fields': entity['fields'] + [("- hp: float", "Purpose: health; Params: none - value")]}))
+    diagram = run(input_dir, output_dir, compact_tooltips=True)
+
+    # Нове поле - з компактними відступами, незмінне поле id - у попередньому вигляді
+    assert re.search(r"&lt;b&gt;hp&lt;/b&gt;: [^\"]*&amp;emsp;", diagram)
+    assert re.search(r"&lt;b&gt;id&lt;/b&gt;: &lt;br/&gt;&amp;nbsp;&amp;nbsp;&amp;nbsp;&amp;nbsp;", diagram)
+
+
+def big_class() -> list[dict]:
+    return [{'name': "Big", 'fields': [(f"- field{index}: int", f"Purpose: field number {index}; Params: value - new value")
+                                       for index in range(12)]}]
+
+
+def fields_tooltip(diagram : str) -> str:
+    root = ET.fromstring(diagram)
+    return next(element.get('tooltip') for element in root.iter('UserObject') if element.get('label', "").startswith("- field0"))
+
+
+def test_summary_list_is_limited(tmp_path):
+    """Повний список членів у підказці скороченого класу обмежується --tooltip-max-item-chars."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    write_input(input_dir / "Game.xml", big_class())
+
+    tooltip = fields_tooltip(run(input_dir, output_dir, summarize_over=5, summary_top=3, tooltip_max_item_chars=60))
+
+    full_list = tooltip.split("<br/><br/>")[0]
+    shown, marker = full_list.rsplit("<br/>", 1)
+    assert len(shown) <= 60
+    assert re.fullmatch(r"… \(\+\d+\)", marker)
+
+
+def test_changed_only_keeps_tooltips_of_hidden_members(tmp_path):
+    """Члени, приховані summarize, не вважаються новими: їх підказки не перебудовуються."""
+    input_dir, output_dir = tmp_path / "in", tmp_path / "out"
+    input_dir.mkdir()
+    write_input(input_dir / "Game.xml", big_class())
+
+    first = run(input_dir, output_dir, summarize_over=5, summary_top=3)
+    second = run(input_dir, output_dir, summarize_over=5, summary_top=3, compact_tooltips=True)
+
+    assert second == first
+    assert "&emsp;" not in fields_tooltip(second)
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from generate_uml import UpdateOptions, update_diagrams
+from golden_harness import base_classes, class_xml
+from progress import CancelToken
+
+
+def test_cancelled_result_is_kept(tmp_path):
+    """Скасований файл залишається у результатах з cancelled=True, наступні - з skipped=True."""
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    for name in ("A", "B", "C"):
+        (input_dir / f"{name}.xml").write_text(class_xml(base_classes()), encoding='utf-8')
+
+    token = CancelToken()
+
+    def on_progress(event):
+        # Скасовуємо під час обробки другого файлу
+        if event['event'] == "phase" and event.get('index') == 1:
+            token.cancel()
+
+    events = []
+    results = update_diagrams(str(input_dir), str(tmp_path / "out"), UpdateOptions(
+        cancel_token=token, progress=lambda event: (events.append(event), on_progress(event))))
+
+    assert [(result.success, result.cancelled, result.skipped) for result in results] == \
+        [(True, False, False), (False, True, False), (False, False, True)]
+    assert events[-1]['event'] == "done" and events[-1]['cancelled'] and events[-1]['processed'] == 1
+
+
+def test_missing_input_does_not_stop_the_batch(tmp_path):
+    """Відсутній XML дає невдалий результат з помилкою, а наступні файли обробляються."""
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    (input_dir / "Game.xml").write_text(class_xml(base_classes()), encoding='utf-8')
+
+    results = update_diagrams([str(tmp_path / "Missing.xml"), str(input_dir / "Game.xml")], str(tmp_path / "out"),
+                              UpdateOptions(verbose=False))
+
+    assert [result.success for result in results] == [False, True]
+    assert "Missing.xml" in results[0].error
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Бенчмарк пам'яті: генерує синтетичний XML з класами, оновлює діаграму з профілюванням
+пам'яті (створення та повторне оновлення) і завершується з кодом 1, якщо пік пам'яті
+на клас перевищує поріг.
+
+З --startup перевіряє холодний старт CLI: вимірює весь запуск, коли нічого не змінилося,
+і завершується з кодом 1, якщо він триває довше за поріг.
+
+Приклад:
+    python benchmark.py --classes 500 --max-kb-per-class 60 --output memory.json
+    python benchmark.py --startup --max-startup-ms 50
+"""
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from generate_uml import UpdateOptions, update_diagrams, write_json
+from run_state import STATE_DIR_ENV
+
+
+# Ціль для запуску CLI без змін (Git-хук після кожного коміту), мс
+NOOP_STARTUP_MS = 50.0
+
+
+def generate_input(path, class_count : int, fields : int, methods : int, seed : int = 1):
+    """Створює XML з class_count класами, полями-асоціаціями, наслідуванням та підказками."""
+    rng = random.Random(seed)
+    root = ET.Element('Namespace', {'n': 'Benchmark'})
+    for index in range(class_count):
+        attributes = {'n': f"Class{index}", 'c': f"Purpose: benchmark class {index}; Usage: call it; Notes: none"}
+        if index > 0 and rng.random() < 0.3:
+            attributes['b'] = f"Class{rng.randrange(index)}"
+        class_elem = ET.SubElement(root, 'Class', attributes)
+
+        fields_elem = ET.SubElement(class_elem, 'Fields')
+        for field_index in range(fields):
+            field_type = f"List<Class{rng.randrange(class_count)}>" if rng.random() < 0.3 else "int"
+            ET.SubElement(fields_elem, 'Field', {'v': f"- field{field_index}: {field_type}",
+                                                 'c': f"Purpose: field {field_index}; Params: value - new value"})
+
+        methods_elem = ET.SubElement(class_elem, 'Methods')
+        for method_index in range(methods):
+            ET.SubElement(methods_elem, 'Method', {'v': f"+ Method{method_index}(value: int): void",
+                                                   'c': f"Purpose: method {method_index}; Returns: nothing"})
+
+    ET.ElementTree(root).write(path, encoding='utf-8', xml_declaration=True)
+
+
+def run_pass(xml_path, output_dir, options : UpdateOptions) -> dict:
+    """Оновлює діаграму один раз і повертає пік пам'яті та пам'ять фаз."""
+    result = update_diagrams(xml_path, output_dir, options)[0]
+    if not result.success:
+        raise RuntimeError(result.error)
+
+    peak = max(phase['peak_total_bytes'] for phase in result.memory.values())
+    return {
+        'class_count': result.class_count,
+        'peak_bytes': peak,
+        'peak_bytes_per_class': peak / result.class_count,
+        'timings': result.timings,
+        'phases': result.memory,
+    }
+
+
+def parse_importtime(stderr : str) -> dict[str, tuple[int, int, int]]:
+    """Розбирає вивід -X importtime: модуль -> (власний час у мкс, сумарний час у мкс, глибина вкладення)."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split('|', 2)
+        if not self_us.strip().isdigit():
+            continue  # Заголовок
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return modules
+
+
+def fastest_run_ms(command : list[str], runs : int, env : dict[str, str] | None = None) -> float:
+    """Найкоротший з runs запусків команди у мс: сторонні процеси лише додають час, тому мінімум стабільніший за середнє."""
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, capture_output=True, env=env)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best * 1000
+
+
+def run_startup_check(class_count : int, runs : int = 7) -> dict:
+    """
+    Вимірює весь запуск generate_uml.py, коли нічого не змінилося (найшвидший з runs запусків;
+    при runs=0 час не вимірюється і run_ms та python_ms - None).
+
+    Для діагностики додатково рахує час порожнього запуску Python та, з -X importtime,
+    імпорти понад порожній запуск. CLI запускається з тимчасової копії скриптів,
+    тому Log.log не з'являється поруч із вихідним кодом.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as work_dir:
+        copy_dir = os.path.join(work_dir, "scripts")
+        os.makedirs(copy_dir)
+        for name in os.listdir(script_dir):
+            if name.endswith(".py"):
+                shutil.copy(os.path.join(script_dir, name), copy_dir)
+        script = os.path.join(copy_dir, "generate_uml.py")
+        # Стан запусків - у тимчасовій папці, а не в кеші користувача
+        env = {**os.environ, STATE_DIR_ENV: os.path.join(work_dir, "state")}
+        xml_dir = os.path.join(work_dir, "xml")
+        os.makedirs(xml_dir)
+        generate_input(os.path.join(xml_dir, "Benchmark.xml"), class_count, 6, 6)
+        command = [sys.executable, script, "-i", xml_dir, "-o", os.path.join(work_dir, "out")]
+        # Перший запуск створює діаграму, наступні нічого не змінюють
+        subprocess.run(command, check=True, capture_output=True, env=env)
+
+        run_ms = fastest_run_ms(command, runs, env) if runs > 0 else None
+        python_ms = fastest_run_ms([sys.executable, "-c", "pass"], runs) if runs > 0 else None
+
+        baseline = parse_importtime(subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"],
+                                                   check=True, capture_output=True, text=True).stderr)
+        process = subprocess.run([sys.executable, "-X", "importtime"] + command[1:], check=True,
+                                 capture_output=True, text=True, encoding='utf-8', env=env)
+
+    modules = {name: times for name, times in parse_importtime(process.stderr).items() if name not in baseline}
+    top_level = sorted(((times[1], name) for name, times in modules.items() if times[2] == 0), reverse=True)
+    return {
+        'run_ms': run_ms,
+        'python_ms': python_ms,
+        'import_ms': sum(times[0] for times in modules.values()) / 1000,
+        'modules': [name for name in modules],
+        'top_imports': {name: cumulative_us / 1000 for cumulative_us, name in top_level[:10]},
+    }
+
+
+def startup_main(args) -> int:
+    result = run_startup_check(args.classes, max(args.runs, 1))
+    failed = result['run_ms'] > args.max_startup_ms
+    status = "ПЕРЕВИЩЕНО" if failed else "OK"
+    print(f"Запуск без змін: {result['run_ms']:.0f} мс (поріг {args.max_startup_ms:g}) - {status}; "
+          f"порожній Python {result['python_ms']:.0f} мс, імпорти понад нього {result['import_ms']:.1f} мс (-X importtime)")
+    for name, milliseconds in result['top_imports'].items():
+        print(f"    {name}: {milliseconds:.1f} мс")
+
+    if args.output:
+        write_json(result, args.output)
+    return 1 if failed else 0
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Бенчмарк пам\'яті оновлення діаграм')
+    parser.add_argument('--classes', type=int, default=500, help='Кількість класів у синтетичному XML')
+    parser.add_argument('--fields', type=int, default=6, help='Кількість полів у кожному класі')
+    parser.add_argument('--methods', type=int, default=6, help='Кількість методів у кожному класі')
+    parser.add_argument('--max-kb-per-class', type=float, default=60.0, help='Поріг піку пам\'яті на клас у КБ')
+    parser.add_argument('--startup', action='store_true', help='Перевіряє холодний старт CLI замість пам\'яті')
+    parser.add_argument('--max-startup-ms', type=float, default=NOOP_STARTUP_MS, help='Поріг усього запуску без змін у мс')
+    parser.add_argument('--runs', type=int, default=7, help='Скільки разів запускати CLI без змін (береться найшвидший запуск)')
+    parser.add_argument('--output', help='Зберігає результати у JSON')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    if args.startup:
+        return startup_main(args)
+
+    options = UpdateOptions(cleanup_classes=True, cleanup_arrows=True, profile_memory=True, profile_memory_top=5)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        xml_path = os.path.join(work_dir, "Benchmark.xml")
+        generate_input(xml_path, args.classes, args.fields, args.methods)
+        os.environ[STATE_DIR_ENV] = os.path.join(work_dir, "state")
+
+        output_dir = os.path.join(work_dir, "out")
+        results = {
+            'create': run_pass(xml_path, output_dir, options),
+            'update': run_pass(xml_path, output_dir, options),
+        }
+
+    failed = False
+    for name, result in results.items():
+        kb_per_class = result['peak_bytes_per_class'] / 1024
+        status = "OK" if kb_per_class <= args.max_kb_per_class else "ПЕРЕВИЩЕНО"
+        failed = failed or kb_per_class > args.max_kb_per_class
+        print(f"{name}: {result['class_count']} класів, пік {result['peak_bytes'] / 1024 / 1024:.1f} МБ, "
+              f"{kb_per_class:.1f} КБ на клас (поріг {args.max_kb_per_class}) - {status}")
+        for phase, memory in result['phases'].items():
+            print(f"    {phase}: пік +{memory['peak_bytes'] / 1024 / 1024:.1f} МБ, {result['timings'][phase]:.2f} с")
+
+    if args.output:
+        write_json(results, args.output)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
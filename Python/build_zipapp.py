@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Збирає generate_uml.py з усіма модулями в один файл zipapp (.pyz).
+
+Модулі додаються разом із заздалегідь скомпільованим байткодом: з архіву Python
+не кешує .pyc, тому без нього кожен запуск компілював би всі модулі заново.
+Байткод прив'язаний до версії Python, якою зібрано архів; інші версії використовують .py.
+
+Приклад:
+    python build_zipapp.py --output drawio-updater.pyz
+    python drawio-updater.pyz -i Assets/Docs -o Assets/Docs/Diagrams
+"""
+
+import argparse
+import os
+import py_compile
+import shutil
+import sys
+import tempfile
+import zipapp
+
+
+# Модулі, які не потрібні для роботи CLI
+EXCLUDED_MODULES = {"build_zipapp.py", "benchmark.py", "golden_harness.py"}
+
+
+def build(output_path, interpreter : str | None = None) -> int:
+    """Збирає архів і повертає його розмір у байтах."""
+    source_dir = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as build_dir:
+        for name in sorted(os.listdir(source_dir)):
+            if not name.endswith(".py") or name in EXCLUDED_MODULES:
+                continue
+            shutil.copy2(os.path.join(source_dir, name), os.path.join(build_dir, name))
+            # .pyc поруч з .py - саме там його шукає zipimport; без перевірки часу зміни джерела
+            py_compile.compile(os.path.join(build_dir, name), cfile=os.path.join(build_dir, name[:-3] + ".pyc"),
+                               doraise=True, invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH)
+
+        zipapp.create_archive(build_dir, output_path, interpreter=interpreter, main="generate_uml:main", compressed=True)
+    return os.path.getsize(output_path)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Збирає generate_uml.py в один файл zipapp')
+    parser.add_argument('--output', '-o', default='drawio-updater.pyz', help='Шлях до архіву')
+    parser.add_argument('--python', help='Інтерпретатор для рядка #! (наприклад, "/usr/bin/env python3")')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    size = build(args.output, args.python)
+    print(f"Архів зібрано: {args.output} ({size / 1024:.0f} КБ, Python {sys.version_info.major}.{sys.version_info.minor})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import re
 import xml.etree.ElementTree as ET
 import typing
 
 
+# Заголовки розділів підказки, які розпізнає format_tooltip
+TOOLTIP_SECTIONS = ("Purpose:", "Usage:", "Params:", "Returns:", "Notes:")
+# Маркер пропущених членів у підказці або мітці блоку: "… (+3)"
+HIDDEN_MARKER = re.compile(r"… \(\+\d+\)")
+
+
 class ClassData:
     def __init__(self, name : str, base_class : str | None, class_tooltip : str):
         self.name : str = name
@@ -19,7 +26,20 @@ class ClassData:
         self.fields : str | None = None
         self.methods : str | None = None
 
+        # Неформатовані підказки для перебудови з параметрами (див. build_tooltips)
+        self.raw_class_tooltip : str = class_tooltip
+        # (рядок поля, коротке ім'я, підказка) та (рядок методу, підказка)
+        self.field_items : list[tuple[str, str, str | None]] = []
+        self.method_items : list[tuple[str, str | None]] = []
+        self.custom_tooltips = False
+        # Мітки полів і методів скорочено (див. summarize)
+        self.summarized = False
+        # Розміри, обчислені фазою рендерингу (див. render_pool); None - рахувати у set_data_in_class
+        self.rendered_sizes : tuple[tuple[int, int], tuple[int, int], int] | None = None
+
         self.associations : list["ClassData"] = []
+        # Імена відфільтрованих класів, на які посилаються поля (див. find_associations)
+        self.external_associations : list[str] = []
         
 
         self.class_user_object: ET.Element = None
@@ -28,14 +48,32 @@ class ClassData:
         self.separator_child: ET.Element | None = None
         self.second_child: ET.Element | None = None
 
+    def reset_diagram_state(self):
+        """Скидає зв'язки з діаграмою, щоб модель можна було повторно використати для іншого запуску."""
+        if self.summarized:
+            self.restore_members()
+        if self.custom_tooltips:
+            self.build_tooltips()
+        self.rendered_sizes = None
+        self.associations = []
+        self.external_associations = []
+        self.class_user_object = None
+        self.class_id = None
+        self.first_child = None
+        self.separator_child = None
+        self.second_child = None
+
+    def has_association(self, other : "ClassData") -> bool:
+        """Перевіряє, чи є асоціація з класом other (за іменем, щоб враховувати і посилання-заглушки)."""
+        return any(target.name == other.name for target in self.associations)
+
     def append_field(self, field : str, tooltip : str | None):
         field = field.replace("<", "&lt;").replace(">", "&gt;")
+        short_field = ClassData.get_field_name(field)
+        self.field_items.append((field, short_field, tooltip))
+
         if tooltip is not None:
             tooltip = ClassData.format_tooltip(tooltip)
-            
-            # - damage: float
-            short_field = field.split(":")[0]
-            short_field = short_field.split(" ")[1]
 
 
             if self.fields_tooltip == "":
@@ -48,8 +86,14 @@ class ClassData:
         else:
             self.fields += "<br/>" + field
 
+    def get_field_name(field : str) -> str:
+        """Коротке ім'я поля з його рядка: "- damage: float" -> "damage"."""
+        parts = field.split(":")[0].split(" ")
+        return parts[1] if len(parts) > 1 else parts[0]
+
     def append_method(self, method : str, tooltip : str | None):
         method = method.replace("<", "&lt;").replace(">", "&gt;")
+        self.method_items.append((method, tooltip))
         
         if tooltip is not None:
             tooltip = ClassData.format_tooltip(tooltip)
@@ -75,6 +119,190 @@ class ClassData:
 
         return tooltip
 
+    def shorten_tooltip(tooltip : str, max_chars : int) -> str:
+        """
+        Вкладає неформатовану підказку у max_chars символів.
+
+        Спершу відкидає розділи, крім Purpose та Params, потім обрізає текст з маркером "…".
+        """
+        if max_chars <= 0 or len(tooltip) <= max_chars:
+            return tooltip
+
+        # Розділ починається з заголовка ("Usage:", "Notes:"...), решта частин належить попередньому розділу
+        sections : list[list[str]] = []
+        for part in tooltip.split("; "):
+            if not sections or part.startswith(TOOLTIP_SECTIONS):
+                sections.append([part])
+            else:
+                sections[-1].append(part)
+
+        kept = [section for section in sections if section[0].startswith(("Purpose:", "Params:"))] or sections[:1]
+        tooltip = "; ".join("; ".join(section) for section in kept)
+        if len(tooltip) > max_chars:
+            tooltip = tooltip[:max(max_chars - 1, 0)].rstrip() + "…"
+        return tooltip
+
+    def compact_tooltip(tooltip : str) -> str:
+        """Замінює відступи з &nbsp; на коротші &emsp; (один &emsp; приблизно дорівнює чотирьом пробілам)."""
+        return tooltip.replace("&nbsp;&nbsp;&nbsp;&nbsp;", "&emsp;")
+
+    def join_limited(entries : list[str], max_chars : int) -> str:
+        """З'єднує записи через "<br/>" у межах max_chars (0 - без обмеження); решту записів замінює маркером "… (+кількість)"."""
+        result = ""
+        for index, entry in enumerate(entries):
+            candidate = entry if result == "" else f"{result}<br/>{entry}"
+            if max_chars > 0 and result != "" and len(candidate) > max_chars:
+                return f"{result}<br/>… (+{len(entries) - index})"
+            result = candidate
+        return result
+
+    def build_tooltips(self, max_chars : int = 0, max_item_chars : int = 0, compact : bool = False,
+                       known_tooltips : dict[str, str] | None = None):
+        """
+        Перебудовує підказки класу, полів та методів.
+
+        Args:
+            max_chars: Максимум символів підказки одного члена класу (0 - без обмеження).
+            max_item_chars: Максимум символів підказки всього блоку полів або методів (0 - без обмеження).
+            compact: Використовувати компактне кодування відступів.
+            known_tooltips: Підказки членів, які вже є на діаграмі (рядок члена -> текст, див. get_diagram_tooltips).
+                Їх текст залишається без змін, новий текст будується лише для нових і змінених членів.
+        """
+        def finish(tooltip : str) -> str:
+            return ClassData.compact_tooltip(tooltip) if compact else tooltip
+
+        self.class_tooltip = ""
+        if self.raw_class_tooltip != "":
+            class_tooltip = ClassData.shorten_tooltip(self.raw_class_tooltip, max_chars)
+            self.class_tooltip = finish(f"{self.name}:{ClassData.format_tooltip(class_tooltip)}")
+
+        entries = []
+        for field, short_field, tooltip in self.field_items:
+            if tooltip is None:
+                continue
+            if known_tooltips is not None and field in known_tooltips:
+                entries.append(known_tooltips[field])
+                continue
+            tooltip = ClassData.format_tooltip(ClassData.shorten_tooltip(tooltip, max_chars))
+            entries.append(finish(f"<b>{short_field}</b>: {tooltip}"))
+        self.fields_tooltip = ClassData.join_limited(entries, max_item_chars)
+
+        entries = []
+        for method, tooltip in self.method_items:
+            if tooltip is None:
+                continue
+            if known_tooltips is not None and method in known_tooltips:
+                entries.append(known_tooltips[method])
+                continue
+            tooltip = ClassData.format_tooltip(ClassData.shorten_tooltip(tooltip, max_chars))
+            entries.append(finish(f'<b>{method}</b>{tooltip}'))
+        self.methods_tooltip = ClassData.join_limited(entries, max_item_chars)
+
+        self.custom_tooltips = bool(max_chars or max_item_chars or compact or known_tooltips is not None)
+
+    def summarize(self, threshold : int, top : int, public_only : bool = False, max_item_chars : int = 0) -> bool:
+        """
+        Скорочує мітки великого класу (більше threshold полів і методів разом): у кожному блоці
+        залишаються перші top членів (лише публічні, якщо public_only) та маркер "… (+кількість)".
+        Повний список членів переноситься у підказки блоків і, як і підказки членів,
+        обмежується max_item_chars символами. Повертає True, якщо клас скорочено.
+        """
+        if threshold <= 0 or len(self.field_items) + len(self.method_items) <= threshold:
+            return False
+
+        def summary(members : list[str], tooltip : str) -> tuple[str | None, str]:
+            if not members:
+                return None, tooltip
+            shown = [member for member in members if member.startswith("+")] if public_only else members
+            shown = shown[:top]
+            label = "<br/>".join(shown + ([f"… (+{len(members) - len(shown)})"] if len(shown) < len(members) else []))
+            full_list = ClassData.join_limited(members, max_item_chars)
+            return label, full_list if tooltip == "" else f"{full_list}<br/><br/>{tooltip}"
+
+        self.fields, self.fields_tooltip = summary([field for field, _, _ in self.field_items], self.fields_tooltip)
+        self.methods, self.methods_tooltip = summary([method for method, _ in self.method_items], self.methods_tooltip)
+        self.summarized = True
+        # Підказки змінено - при повторному використанні моделі їх буде перебудовано
+        self.custom_tooltips = True
+        return True
+
+    def restore_members(self):
+        """Відновлює повні мітки полів і методів після summarize."""
+        self.fields = "<br/>".join(field for field, _, _ in self.field_items) or None
+        self.methods = "<br/>".join(method for method, _ in self.method_items) or None
+        self.summarized = False
+
+    def get_diagram_members(self) -> set[str]:
+        """
+        Рядки полів і методів, які зараз є на діаграмі (після load_data_from_diagram).
+
+        Маркер "… (+кількість)" не є членом. Якщо блок скорочено (summarize), приховані члени
+        беруться з повного списку на початку підказки блоку (до порожнього рядка або першого запису).
+        """
+        members = set()
+        for child in (self.first_child, self.second_child):
+            if child is None or not child.get('label'):
+                continue
+            lines = child.get('label').split("<br/>")
+            if any(HIDDEN_MARKER.fullmatch(line) for line in lines) and child.get('tooltip'):
+                for line in child.get('tooltip').split("<br/>"):
+                    if line == "" or line.startswith("<b>"):
+                        break
+                    lines.append(line)
+            members.update(line for line in lines if not HIDDEN_MARKER.fullmatch(line))
+        return members
+
+    def get_render_state(self) -> tuple:
+        """Дані для рендерингу в іншому процесі: без посилань на діаграму та інші класи."""
+        return (self.name, self.base_class, self.raw_class_tooltip, self.class_tooltip,
+                self.fields, self.fields_tooltip, self.methods, self.methods_tooltip,
+                self.field_items, self.method_items, self.custom_tooltips, self.summarized)
+
+    def from_render_state(state : tuple) -> "ClassData":
+        """Відновлює клас з get_render_state (підказки не форматуються повторно)."""
+        class_data = ClassData(state[0], state[1], "")
+        (class_data.raw_class_tooltip, class_data.class_tooltip,
+         class_data.fields, class_data.fields_tooltip, class_data.methods, class_data.methods_tooltip,
+         class_data.field_items, class_data.method_items, class_data.custom_tooltips, class_data.summarized) = state[2:]
+        return class_data
+
+    def get_sizes(self) -> tuple[tuple[int, int], tuple[int, int], int]:
+        """Розміри блоків полів і методів та ширина заголовка класу."""
+        if self.rendered_sizes is not None:
+            return self.rendered_sizes
+        return self.get_size_of_fields(), self.get_size_of_methods(), ClassData.get_size_of_string(self.get_class_full_name())[0]
+
+    def get_diagram_tooltips(self) -> dict[str, str]:
+        """
+        Тексти підказок членів класу, які зараз показані на діаграмі: рядок члена -> текст підказки.
+
+        Підказка блоку - записи, з'єднані "<br/>"; запис поля починається з "<b>ім'я</b>: ",
+        запис методу - з "<b>рядок методу</b>". Члени без запису у результат не потрапляють.
+        """
+        members = self.get_diagram_members()
+        field_names = {ClassData.get_field_name(member): member for member in members}
+        entries : dict[str, list[str]] = {}
+        for child in (self.first_child, self.second_child):
+            if child is None or not child.get('tooltip'):
+                continue
+            current = None
+            for part in child.get('tooltip').split("<br/>"):
+                head = part[3:part.find("</b>")] if part.startswith("<b>") and "</b>" in part else None
+                if head in members:
+                    current = head
+                elif head in field_names and part.startswith(f"<b>{head}</b>: "):
+                    current = field_names[head]
+                elif HIDDEN_MARKER.fullmatch(part):
+                    current = None
+                    continue
+                elif current is not None:
+                    entries[current].append(part)
+                    continue
+                else:
+                    continue
+                entries[current] = [part]
+        return {member: "<br/>".join(parts) for member, parts in entries.items()}
+
     def get_size_of_fields(self) -> tuple[int, int]: 
         return ClassData.get_size_of_string(self.fields)
     
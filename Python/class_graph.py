@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from class_data import ClassData
+
+
+class ClassGraph:
+    """
+    Компактна модель зв'язків між класами з цілочисельними індексами.
+
+    Асоціації зберігаються у форматі CSR (assoc_indptr/assoc_indices), наслідування -
+    масивом parent (індекс базового класу або -1, якщо базового класу немає у файлі).
+    external_fan_out - кількість асоціацій кожного класу з відфільтрованими класами.
+    """
+
+    def __init__(self, names : list[str], assoc_indptr : np.ndarray, assoc_indices : np.ndarray, parent : np.ndarray,
+                 external_fan_out : np.ndarray | None = None):
+        self.names = names
+        self.assoc_indptr = assoc_indptr
+        self.assoc_indices = assoc_indices
+        self.parent = parent
+        self.external_fan_out = external_fan_out if external_fan_out is not None else np.zeros(len(names), dtype=np.int64)
+
+    @classmethod
+    def from_class_data(cls, class_data_list : list[ClassData]) -> "ClassGraph":
+        """Будує граф зі списку класів, для яких уже знайдено асоціації."""
+        names = [class_data.name for class_data in class_data_list]
+        index : dict[str, int] = {}
+        for i, name in enumerate(names):
+            index.setdefault(name, i)
+
+        counts = np.fromiter((len(class_data.associations) for class_data in class_data_list), dtype=np.int64, count=len(names))
+        assoc_indptr = np.zeros(len(names) + 1, dtype=np.int64)
+        np.cumsum(counts, out=assoc_indptr[1:])
+        assoc_indices = np.fromiter((index[target.name] for class_data in class_data_list for target in class_data.associations),
+                                    dtype=np.int32, count=int(assoc_indptr[-1]))
+
+        parent = np.fromiter((index.get(class_data.base_class, -1) if class_data.base_class else -1 for class_data in class_data_list),
+                             dtype=np.int32, count=len(names))
+        external_fan_out = np.fromiter((len(class_data.external_associations) for class_data in class_data_list),
+                                       dtype=np.int64, count=len(names))
+        return cls(names, assoc_indptr, assoc_indices, parent, external_fan_out)
+
+    def fan_out(self) -> np.ndarray:
+        """Кількість класів, з якими асоційований кожен клас."""
+        return np.diff(self.assoc_indptr)
+
+    def fan_in(self) -> np.ndarray:
+        """Кількість класів, які асоційовані з кожним класом."""
+        return np.bincount(self.assoc_indices, minlength=len(self.names))
+
+    def children_count(self) -> np.ndarray:
+        """Кількість прямих нащадків кожного класу."""
+        parents = self.parent[self.parent >= 0]
+        return np.bincount(parents, minlength=len(self.names))
+
+    def inheritance_depth(self) -> np.ndarray:
+        """Глибина наслідування в межах файлу (0 - базовий клас не з цього файлу)."""
+        depth = np.zeros(len(self.names), dtype=np.int32)
+        ancestor = self.parent.copy()
+        # Піднімаємось по всіх ланцюжках одночасно; обмеження захищає від циклів у вхідних даних
+        for _ in range(len(self.names)):
+            active = ancestor >= 0
+            if not active.any():
+                break
+            depth[active] += 1
+            ancestor[active] = self.parent[ancestor[active]]
+        return depth
+
+    def strongly_connected_components(self) -> np.ndarray:
+        """Повертає номер компоненти сильної зв'язності для кожного класу (ітеративний алгоритм Тар'яна)."""
+        count = len(self.names)
+        indptr = self.assoc_indptr.tolist()
+        indices = self.assoc_indices.tolist()
+
+        order = [-1] * count
+        low = [0] * count
+        on_stack = [False] * count
+        labels = [-1] * count
+        stack = []
+        counter = 0
+        component = 0
+
+        for root in range(count):
+            if order[root] != -1:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            work = [(root, indptr[root])]
+
+            while work:
+                node, edge = work[-1]
+                if edge < indptr[node + 1]:
+                    work[-1] = (node, edge + 1)
+                    target = indices[edge]
+                    if order[target] == -1:
+                        order[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = True
+                        work.append((target, indptr[target]))
+                    elif on_stack[target]:
+                        low[node] = min(low[node], order[target])
+                    continue
+
+                work.pop()
+                if work:
+                    caller = work[-1][0]
+                    low[caller] = min(low[caller], low[node])
+                if low[node] == order[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        labels[member] = component
+                        if member == node:
+                            break
+                    component += 1
+
+        return np.array(labels, dtype=np.int32)
+
+    def association_cycles(self) -> list[list[str]]:
+        """Групи класів, пов'язаних циклом асоціацій (компоненти сильної зв'язності з 2+ класів)."""
+        if not self.names:
+            return []
+        labels = self.strongly_connected_components()
+        sizes = np.bincount(labels)
+        order = np.argsort(labels, kind='stable')
+        bounds = np.cumsum(sizes)[:-1]
+
+        cycles = []
+        for members in np.split(order, bounds):
+            if len(members) > 1:
+                cycles.append(sorted(self.names[i] for i in members))
+        cycles.sort(key=lambda names: (-len(names), names))
+        return cycles
+
+    def report(self, top : int = 20) -> dict:
+        """Метрики архітектури: fan-in/fan-out, глибина наслідування, цикли асоціацій та найбільш зв'язані класи."""
+        fan_in = self.fan_in()
+        fan_out = self.fan_out()
+        depth = self.inheritance_depth()
+        children = self.children_count()
+        coupling = fan_in + fan_out
+
+        # Найбільш зв'язані класи: за спаданням coupling, при рівності - за іменем
+        ranked = sorted(range(len(self.names)), key=lambda i: (-int(coupling[i]), self.names[i]))[:top]
+
+        def metrics(i):
+            return {
+                'fan_in': int(fan_in[i]),
+                'fan_out': int(fan_out[i]),
+                'inheritance_depth': int(depth[i]),
+                'children': int(children[i]),
+                'external_fan_out': int(self.external_fan_out[i]),
+            }
+
+        return {
+            'classes': len(self.names),
+            'associations': int(len(self.assoc_indices)),
+            'extends': int(np.count_nonzero(self.parent >= 0)),
+            'external_associations': int(self.external_fan_out.sum()),
+            'max_inheritance_depth': int(depth.max()) if len(depth) else 0,
+            'association_cycles': self.association_cycles(),
+            'most_coupled': [{'name': self.names[i], **metrics(i)} for i in ranked],
+            'metrics': {self.names[i]: metrics(i) for i in range(len(self.names))},
+        }
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable
+
+
+def write_diagram_file(filepath : str, content : str | list[str]) -> int:
+    """
+    Записує вміст діаграми (рядок або список фрагментів) у файл і повертає кількість записаних байтів.
+
+    Вміст спершу пишеться у тимчасовий файл поруч, який потім замінює діаграму,
+    тому перерваний запис не залишає частково записаної діаграми.
+    """
+    if isinstance(content, str):
+        content = [content]
+
+    # Створюємо директорію, якщо вона не існує
+    directory = os.path.dirname(filepath)
+    os.makedirs(directory, exist_ok=True)
+
+    bytes_written = 0
+    # Ім'я унікальне для процесу та потоку; режим 'x' дає файлу звичайні права доступу
+    temp_path = f"{filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'x', encoding='utf-8') as f:
+            for chunk in content:
+                f.write(chunk)
+                bytes_written += len(chunk) if chunk.isascii() else len(chunk.encode('utf-8'))
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return bytes_written
+
+
+class PrefetchedInput:
+    """Вміст вхідного XML та існуючої діаграми, прочитаний заздалегідь."""
+
+    def __init__(self, xml_path : str, output_path : str):
+        self.xml_path = xml_path
+        self.output_path = output_path
+        self.xml_stat : os.stat_result | None = None
+        self.xml_content : bytes | None = None
+        # None, якщо діаграми ще не існує
+        self.diagram_content : bytes | None = None
+
+
+def read_input(xml_path : str, output_path : str) -> PrefetchedInput:
+    """Читає вхідний XML та існуючу діаграму (якщо вона є) з диска."""
+    prefetched = PrefetchedInput(xml_path, output_path)
+    prefetched.xml_stat = os.stat(xml_path)
+    with open(xml_path, 'rb') as f:
+        prefetched.xml_content = f.read()
+
+    if os.path.exists(output_path):
+        with open(output_path, 'rb') as f:
+            prefetched.diagram_content = f.read()
+    return prefetched
+
+
+class InputPrefetcher:
+    """Читає наступний вхідний файл у фоновому потоці, поки обробляється поточний."""
+
+    def __init__(self, jobs : list[tuple[str, str]]):
+        self.jobs = jobs
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drawio-reader")
+
+    def __iter__(self):
+        """Повертає пари (job, Future[PrefetchedInput]) у порядку вхідного списку."""
+        next_future = None
+        if self.jobs:
+            next_future = self._executor.submit(read_input, *self.jobs[0])
+
+        for index, job in enumerate(self.jobs):
+            future = next_future
+            if index + 1 < len(self.jobs):
+                next_future = self._executor.submit(read_input, *self.jobs[index + 1])
+            yield job, future
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DiagramWriter:
+    """
+    Записує готові діаграми у фоновому потоці.
+
+    Черга обмежена max_pending діаграмами: якщо вона заповнена, submit чекає на найстаршу.
+    Результати записів обробляються через on_done у тому ж порядку, в якому їх передали,
+    тому вивід та помилки не залежать від планування потоків.
+    """
+
+    def __init__(self, max_pending : int = 2, on_done : Callable[[object, int, Exception | None], None] | None = None):
+        self.max_pending = max(1, max_pending)
+        self.on_done = on_done
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drawio-writer")
+        self._pending : deque[tuple[Future, object]] = deque()
+
+    def submit(self, filepath : str, content : str | list[str], token : object):
+        """Ставить діаграму у чергу на запис. token передається у on_done разом з результатом."""
+        self._pending.append((self._executor.submit(write_diagram_file, filepath, content), token))
+        while len(self._pending) > self.max_pending:
+            self._finish_oldest()
+
+    def _finish_oldest(self):
+        future, token = self._pending.popleft()
+        try:
+            bytes_written = future.result()
+            error = None
+        except Exception as e:
+            bytes_written = 0
+            error = e
+        if self.on_done is not None:
+            self.on_done(token, bytes_written, error)
+
+    def close(self):
+        """Чекає завершення всіх записів."""
+        while self._pending:
+            self._finish_oldest()
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
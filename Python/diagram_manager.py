@@ -1,26 +1,36 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import logging
 from pathlib import Path
 import xml.etree.ElementTree as ET
-import uuid
+import hashlib
 from class_data import ClassData
+from diagram_io import write_diagram_file
+from edge_store import EDGE_ASSOCIATION, EDGE_EXTENDS, EdgeStore
+from style_cache import CellKind, intern_style, parse_style, style_kind, update_style
+from version import FORMAT_VERSION
 
 
+# Тег заглушки для елементів, які зберігаються як готовий XML-фрагмент
+RAW_TAG = "__raw__"
+
+# Позначка формату на mxGraphModel: діаграми з нею вже не потребують міграції
+FORMAT_VERSION_ATTR = "drawioUpdaterFormat"
+
 
 class DiagramManager:
     """Клас для роботи з діаграмами drawio через XML."""
 
-    def __init__(self, logger : logging.Logger):
+    def __init__(self, logger : logging.Logger, verbose : bool = True):
         self.root = None
         self.diagram_element = None
         self.mxgraph_model = None
         self.filepath = None
         self.logger = logger
 
-        self.class_style_identifier = "childLayout=stackLayout"
         
         # Стилі для елементів діаграми (з прикладу drawpyo)
         self.class_style = "swimlane;whiteSpace=wrap;rounded=0;dashed=0;fontStyle=1;childLayout=stackLayout;startSize=40;horizontalStack=0;horizontal=1;resizeParent=1;resizeParentMax=0;resizeLast=0;collapsible=1;marginButtom=0;html=1;align=center;verticalAlign=top;marginBottom=0;"
@@ -37,12 +47,64 @@ class DiagramManager:
 
         self.auto_resize = True
 
-    def _generate_id(self):
-        """Генерує унікальний ID для елементів діаграми."""
-        return str(uuid.uuid4().int)[:12]  # Використовуємо числовий ID як в drawpyo
+        # Стрілки поточної сторінки за парою класів (див. get_edges)
+        self.edges : EdgeStore | None = None
+        # Класи, розміщені на поточній сторінці (з них будується сховище стрілок)
+        self.page_classes : list[ClassData] = []
+
+        # Усі ID, які вже є в діаграмі (для перевірки колізій)
+        self.ids : set[str] = set()
+
+        # Елементи, які скрипт ніколи не змінює (картинки, довільні фігури), у вигляді XML-фрагментів
+        self.raw_cells : list[str] = []
+
+        # Чи друкувати зміни діаграми у stdout
+        self.verbose = verbose
+
+        # Статистика змін за поточний запуск
+        self.classes_added : list[str] = []
+        self.classes_removed : list[str] = []
+        self.arrows_added : list[str] = []
+        self.arrows_removed : list[str] = []
+        self.bytes_written = 0
+
+    def _report(self, log : str, error : bool = False):
+        """Логує зміну діаграми та друкує її, якщо увімкнено verbose."""
+        if self.verbose:
+            print(log)
+        if error:
+            self.logger.error(log)
+        else:
+            self.logger.info(log)
+
+    def _compute_id(self, role : str, key : str, attempt : int = 0) -> str:
+        """Обчислює детермінований ID для елемента з роллю role та ключем key."""
+        seed = f"{role}:{key}" if attempt == 0 else f"{role}:{key}#{attempt}"
+        digest = hashlib.sha1(seed.encode('utf-8')).hexdigest()
+        return str(int(digest, 16))[:12]  # Використовуємо числовий ID як в drawpyo
+
+    def _generate_id(self, role : str, key : str):
+        """
+        Генерує детермінований унікальний ID для елементів діаграми.
+
+        Один і той самий елемент (роль + ключ) при кожному запуску отримує той самий ID,
+        тому повторна генерація не змінює файл. Якщо ID вже зайнятий - додаємо номер спроби.
+        """
+        attempt = 0
+        new_id = self._compute_id(role, key)
+        while new_id in self.ids:
+            attempt += 1
+            new_id = self._compute_id(role, key, attempt)
+        self.ids.add(new_id)
+        return new_id
+
+    def _collect_ids(self):
+        """Збирає всі ID, які вже є в діаграмі."""
+        self.ids = {elem.get('id') for elem in self.root.iter() if elem.get('id') is not None}
 
     def _create_empty_diagram(self):
         """Створює пусту структуру діаграми."""
+        self.ids = set()
         # Корневий елемент (як в прикладі drawpyo)
         self.root = ET.Element("mxfile")
         self.root.set("host", "Python Script")
@@ -50,11 +112,15 @@ class DiagramManager:
         self.root.set("agent", "Python 3.x, Custom XML")
         self.root.set("version", "21.6.5")
         self.root.set("type", "device")
-        
+
+        self._add_page("Page-1")
+
+    def _add_page(self, name : str):
+        """Додає нову сторінку (елемент diagram) і робить її поточною."""
         # Діаграма
         self.diagram_element = ET.SubElement(self.root, "diagram")
-        self.diagram_element.set("name", "Page-1")
-        self.diagram_element.set("id", self._generate_id())
+        self.diagram_element.set("name", name)
+        self.diagram_element.set("id", self._generate_id("diagram", f"{Path(self.filepath).stem}/{name}"))
         
         # Створюємо mxGraphModel (як в прикладі)
         self.mxgraph_model = ET.SubElement(self.diagram_element, "mxGraphModel")
@@ -73,6 +139,7 @@ class DiagramManager:
         self.mxgraph_model.set("pageHeight", "1100")
         self.mxgraph_model.set("math", "0")
         self.mxgraph_model.set("shadow", "0")
+        self.mxgraph_model.set(FORMAT_VERSION_ATTR, FORMAT_VERSION)
         
         # Кореневий об'єкт
         self.root_obj = ET.SubElement(self.mxgraph_model, "root")
@@ -80,17 +147,71 @@ class DiagramManager:
         # Додаємо базові елементи (0 та 1)
         cell_0 = ET.SubElement(self.root_obj, "mxCell", id="0")
         cell_1 = ET.SubElement(self.root_obj, "mxCell", id="1", parent="0")
+        self.ids.update(("0", "1"))
 
-    def open_diagram_or_create(self, filepath):
+    def page_names(self) -> list[str]:
+        """Повертає імена всіх сторінок діаграми."""
+        return [diagram.get('name', '') for diagram in self.root.findall('diagram')]
+
+    def select_page(self, name : str) -> bool:
+        """
+        Робить поточною сторінку з іменем name, створюючи її, якщо такої немає.
+
+        Returns:
+            bool: True, якщо сторінку вибрано, False, якщо вона не має mxGraphModel/root.
+        """
+        diagram = next((d for d in self.root.findall('diagram') if d.get('name', '') == name), None)
+        if diagram is None:
+            self._add_page(name)
+        else:
+            mxgraph_model = diagram.find('mxGraphModel')
+            root_obj = mxgraph_model.find('root') if mxgraph_model is not None else None
+            if root_obj is None:
+                self.logger.error(f"Сторінка без mxGraphModel/root: {name}")
+                return False
+            self.diagram_element = diagram
+            self.mxgraph_model = mxgraph_model
+            self.root_obj = root_obj
+        # Сховище стрілок будується для кожної сторінки окремо
+        self.edges = None
+        self.page_classes = []
+
+        # Нові класи на кожній сторінці розміщуємо з початку
+        self.current_x = 50
+        self.current_y = 50
+        self.max_height_on_line = 0
+        return True
+
+    def set_page_link(self, user_object : ET.Element, page_name : str):
+        """Робить елемент посиланням на сторінку page_name (клік у draw.io відкриває сторінку)."""
+        diagram = next((d for d in self.root.findall('diagram') if d.get('name', '') == page_name), None)
+        if user_object is None or diagram is None:
+            return
+        user_object.set('link', f"data:page/id,{diagram.get('id')}")
+
+    def find_class_pages(self) -> dict[str, str]:
+        """Повертає для кожного класу в діаграмі (за label) ім'я сторінки, на якій він розміщений."""
+        class_pages = {}
+        for diagram in self.root.findall('diagram'):
+            for userObject in diagram.findall('mxGraphModel/root/UserObject'):
+                cell = userObject.find('mxCell')
+                if cell is not None and style_kind(cell.get('style')) is CellKind.CLASS:
+                    class_pages.setdefault(userObject.get('label'), diagram.get('name', ''))
+        return class_pages
+
+    def open_diagram_or_create(self, filepath, content : bytes | None = None):
         """
         Відкриває існуючу діаграму або створює нову, якщо файл не існує.
         
         Args:
             filepath (str): Шлях до файлу діаграми.
+            content (bytes | None): Вже прочитаний вміст файлу (наприклад, у фоновому потоці).
             
         Returns:
             bool: True, якщо діаграма успішно відкрита або створена, інакше False.
         """
+        self.edges = None
+        self.page_classes = []
         try:
             if not os.path.isabs(filepath):
                 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -100,15 +221,14 @@ class DiagramManager:
             
             path = Path(self.filepath)
             
-            if path.exists():
+            if content is not None or path.exists():
                 self.logger.info(f"Відкриваємо існуючу діаграму: {filepath}")
                 
-                # Читаємо існуючий файл
-                with open(self.filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # Парсимо XML
-                self.root = ET.fromstring(content)
+                # Парсимо XML інкрементно, не читаючи весь файл у рядок
+                if content is None:
+                    self.root = self._parse_diagram(self.filepath)
+                else:
+                    self.root = self._parse_diagram(io.BytesIO(content))
                 self.diagram_element = self.root.find('diagram')
                 
                 if self.diagram_element is not None:
@@ -120,6 +240,7 @@ class DiagramManager:
                     if self.root_obj is None:
                         self.logger.error("Не знайдено кореневий об'єкт у моделі")
                         return False
+                    self._collect_ids()
                 else:
                     self.logger.error("Не знайдено елемент diagram")
                     return False
@@ -134,26 +255,124 @@ class DiagramManager:
             self.logger.error(f"Помилка при відкритті/створенні діаграми: {e}")
             return False
         
-    def fix_diff_xml(self, tree : ET.ElementTree):
-        # Записуємо у тимчасовий рядок
-            import io
-            with io.BytesIO() as buffer:
-                tree.write(buffer, encoding='utf-8', xml_declaration=True)
-                xml_content = buffer.getvalue().decode('utf-8')
-            
-            # Виправляємо деякі проблеми з XML
-            xml_content = xml_content.replace("\"/>", "\" />")
-            xml_content = xml_content.replace(f"<?xml version='1.0' encoding='utf-8'?>\n", "")
-            xml_content += "\n"
-            xml_content = xml_content.replace("'", "&#39;")
-            
-            # Записуємо виправлений контент у файл
-            with open(self.filepath, 'w', encoding='utf-8') as f:
-                f.write(xml_content)
+    def _parse_diagram(self, source) -> ET.Element:
+        """
+        Інкрементно парсить діаграму з файлу або файлового об'єкта.
+
+        Елементи, які скрипт ніколи не змінює, одразу після парсингу замінюються
+        на заглушки, а їх XML зберігається компактним рядком у self.raw_cells.
+        """
+        self.raw_cells = []
+        layer_ids = set()
+        # [елемент, індекс у батька, кількість дітей]. Парсер може випереджати події,
+        # тому індекс рахуємо самі, а не беремо останню дитину батька
+        stack = []
+
+        parser = ET.iterparse(source, events=("start", "end"))
+        for event, elem in parser:
+            if event == "start":
+                index = -1
+                if stack:
+                    index = stack[-1][2]
+                    stack[-1][2] += 1
+                stack.append([elem, index, 0])
+                # Однакові стилі тисяч комірок зберігаються одним рядком
+                style = elem.get('style')
+                if style is not None:
+                    elem.set('style', intern_style(style))
+                continue
+
+            _, index, _ = stack.pop()
+            if not stack or stack[-1][0].tag != 'root':
+                continue
+
+            # Шари - це mxCell з parent="0" (зазвичай "1")
+            if elem.tag == 'mxCell' and elem.get('parent') == '0':
+                layer_ids.add(elem.get('id'))
+            elif self._is_raw_cell(elem, layer_ids):
+                stack[-1][0][index] = self._make_raw_placeholder(elem)
+
+        return parser.root
+
+    def _is_raw_cell(self, elem : ET.Element, layer_ids : set[str]) -> bool:
+        """Перевіряє, чи елемент не потрібен скрипту (картинка, довільна фігура тощо)."""
+        if elem.tag == 'object':
+            cell = elem.find('mxCell')
+        elif elem.tag == 'mxCell' and not elem.get('value'):
+            cell = elem
+        else:
+            return False
+
+        if cell is None or cell.get('vertex') != '1' or cell.get('parent') not in layer_ids:
+            return False
+        if 'source' in cell.attrib or 'target' in cell.attrib:
+            return False
+
+        return style_kind(cell.get('style')) not in (CellKind.CLASS, CellKind.SEPARATOR)
+
+    def _make_raw_placeholder(self, elem : ET.Element) -> ET.Element:
+        """Зберігає елемент як XML-фрагмент (з відступами як у збереженому файлі) і повертає заглушку."""
+        elem.tail = None
+        # mxfile > diagram > mxGraphModel > root > елемент
+        ET.indent(elem, space="  ", level=4)
+        self.raw_cells.append(ET.tostring(elem, encoding="unicode"))
+        return ET.Element(RAW_TAG, {'raw': str(len(self.raw_cells) - 1), 'id': elem.get('id', '')})
+
+    def fix_diff_xml(self, xml_content : str) -> str:
+        """Виправляє фрагмент XML так, щоб мінімізувати diff з файлами, збереженими draw.io."""
+        xml_content = xml_content.replace("\"/>", "\" />")
+        xml_content = xml_content.replace("'", "&#39;")
+        return xml_content
+
+    def serialize_diagram(self) -> list[str]:
+        """
+        Повертає вміст діаграми, готовий до запису у файл, у вигляді списку фрагментів.
 
-    def save_diagram(self):
+        Кожна дитина <root> серіалізується окремо, тому великі незмінні елементи
+        (self.raw_cells) потрапляють у результат без копіювання всього документа.
+        """
+        tree = ET.ElementTree(self.root)
+        ET.indent(tree, space="  ", level=0)
+
+        # Тимчасово замінюємо дітей кожного <root> на маркер і серіалізуємо лише каркас
+        roots = self.root.findall('diagram/mxGraphModel/root')
+        detached = []
+        for index, root_obj in enumerate(roots):
+            children = list(root_obj)
+            marker = ET.Element("__children__", {'index': str(index)})
+            marker.tail = children[-1].tail if children else root_obj.text
+            detached.append(children)
+            root_obj[:] = [marker]
+
+        try:
+            skeleton = ET.tostring(self.root, encoding="unicode")
+        finally:
+            for root_obj, children in zip(roots, detached):
+                root_obj[:] = children
+
+        chunks = []
+        for index, children in enumerate(detached):
+            marker = f'<__children__ index="{index}" />'
+            prefix, skeleton = skeleton.split(marker, 1)
+            chunks.append(self.fix_diff_xml(prefix))
+            for child in children:
+                if child.tag == RAW_TAG:
+                    chunks.append(self.fix_diff_xml(self.raw_cells[int(child.get('raw'))]))
+                    chunks.append(self.fix_diff_xml(child.tail or ""))
+                else:
+                    chunks.append(self.fix_diff_xml(ET.tostring(child, encoding="unicode")))
+            # Хвіст останньої дитини вже записаний разом з нею
+            skeleton = skeleton[len(children[-1].tail or ""):] if children else skeleton
+        chunks.append(self.fix_diff_xml(skeleton))
+        chunks.append("\n")
+        return chunks
+
+    def save_diagram(self, content : list[str] | None = None):
         """
         Зберігає діаграму у файл.
+
+        Args:
+            content: Вже серіалізований вміст (serialize_diagram); якщо None, діаграма серіалізується тут.
         
         Returns:
             bool: True, якщо діаграма успішно збережена, інакше False.
@@ -163,14 +382,10 @@ class DiagramManager:
                 self.logger.error("Діаграма не ініціалізована")
                 return False
             
-            # Створюємо директорію, якщо вона не існує
-            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
-            
             # Записуємо файл
-            tree = ET.ElementTree(self.root)
-            ET.indent(tree, space="  ", level=0)
-            
-            self.fix_diff_xml(tree)
+            if content is None:
+                content = self.serialize_diagram()
+            self.bytes_written = write_diagram_file(self.filepath, content)
             
             self.logger.info(f"Діаграму збережено: {self.filepath}")
             return True
@@ -218,9 +433,8 @@ class DiagramManager:
 
     def create_class(self, classData: ClassData, width, height) -> ET.Element:
         """Створює контейнер класу."""
-        class_id = self._generate_id()
-
         full_name = classData.get_class_full_name()
+        class_id = self._generate_id("class", full_name)
         
         geometry = {
             'x': self.current_x,
@@ -248,9 +462,9 @@ class DiagramManager:
         
         return user_object
 
-    def create_class_item(self, value, tooltip, parent_id, y=40, width=300, height=205) -> ET.Element:
-        """Створює елемент класу."""
-        item_id = self._generate_id()
+    def create_class_item(self, value, tooltip, parent_id, role, y=40, width=300, height=205) -> ET.Element:
+        """Створює елемент класу (role - "fields" або "methods")."""
+        item_id = self._generate_id(role, parent_id)
         
         geometry = {
             'x': 0,
@@ -272,7 +486,7 @@ class DiagramManager:
 
     def create_class_separator(self, parent_id, y=0, width=300) -> ET.Element:
         """Створює розділювач класу."""
-        separator_id = self._generate_id()
+        separator_id = self._generate_id("separator", parent_id)
         
         geometry = {
             'x': 0,
@@ -293,12 +507,14 @@ class DiagramManager:
     
     def set_data_in_class(self, classData: ClassData):
         """Встановлює дані у клас."""
+        self.page_classes.append(classData)
+        # Сховище стрілок не знає рядків нового класу - перебудуємо його при наступному зверненні
+        self.edges = None
 
-        fields_width, fields_height = classData.get_size_of_fields()
-        methods_width, methods_height = classData.get_size_of_methods()
+        (fields_width, fields_height), (methods_width, methods_height), name_width = classData.get_sizes()
 
         class_width = max(fields_width, methods_width)
-        class_width = max(class_width, ClassData.get_size_of_string(classData.get_class_full_name())[0])
+        class_width = max(class_width, name_width)
         class_height = 40 + fields_height + methods_height
         if classData.fields is not None and classData.methods is not None:
             class_height += 2
@@ -307,15 +523,16 @@ class DiagramManager:
         y = 40
         if find_class is None:
             find_class = self.create_class(classData, class_width, class_height)
+            self.classes_added.append(classData.name)
             classData.class_id = find_class.attrib['id']
             classData.class_user_object = find_class
             if classData.fields is not None:
-                classData.first_child = self.create_class_item(classData.fields, classData.fields_tooltip, classData.class_id, y, class_width, fields_height)
+                classData.first_child = self.create_class_item(classData.fields, classData.fields_tooltip, classData.class_id, "fields", y, class_width, fields_height)
                 y += fields_height
                 if classData.methods is not None:
                     classData.separator_child = self.create_class_separator(classData.class_id, y, class_width)
             if classData.methods is not None:
-                classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, y, class_width, methods_height)
+                classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, "methods", y, class_width, methods_height)
             return find_class
         else:
             if classData.class_tooltip is not None:
@@ -333,13 +550,13 @@ class DiagramManager:
                     y += fields_height
                     classData.separator_child = self.create_class_separator(classData.class_id, y, class_width)
                     y += 2
-                    classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, y, class_width, methods_height)
+                    classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, "methods", y, class_width, methods_height)
                 else:
-                    classData.first_child = self.create_class_item(classData.fields, classData.fields_tooltip, classData.class_id, y, class_width, fields_height)
+                    classData.first_child = self.create_class_item(classData.fields, classData.fields_tooltip, classData.class_id, "fields", y, class_width, fields_height)
                     y += fields_height
                     classData.separator_child = self.create_class_separator(classData.class_id, y, class_width)
                     y += 2
-                    classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, y, class_width, methods_height)
+                    classData.second_child = self.create_class_item(classData.methods, classData.methods_tooltip, classData.class_id, "methods", y, class_width, methods_height)
 
             elif classData.fields is not None or classData.methods is not None:
                 val = classData.fields
@@ -358,7 +575,8 @@ class DiagramManager:
                     classData.first_child.set('label', val)
                     classData.first_child.set('tooltip', tooltip)
                 elif classData.first_child is None:
-                    classData.first_child = self.create_class_item(val, tooltip, classData.class_id, y, class_width, fields_height)
+                    role = "fields" if classData.fields is not None else "methods"
+                    classData.first_child = self.create_class_item(val, tooltip, classData.class_id, role, y, class_width, fields_height)
             else:
                 if classData.second_child is not None:
                     self.remove_cell(classData.second_child)
@@ -423,22 +641,21 @@ class DiagramManager:
         target_cell = targetClassData.class_user_object
         
         arrow = self.find_arrow(sourceClassData, targetClassData)
+        if arrow is not None:
+            return
         arrow2 = self.find_arrow(targetClassData, sourceClassData)
-        if arrow is None and arrow2 is not None:
-            if self.double_association_style not in arrow2.get('style'):
-                arrow2.set('style', self.double_association_style)
+        if arrow2 is not None:
+            if style_kind(arrow2.get('style')) is not CellKind.DOUBLE_ASSOCIATION:
+                self._restyle_association(arrow2, self.double_association_style, start_arrow="classic")
                 log = f'!Тепер двостороння асоціація: {sourceClassData.name} <-> {targetClassData.name}'
-                print(log)
-                self.logger.info(log)
-            return
-        if arrow is not None:
+                self._report(log)
             return
         
         if source_cell is not None and target_cell is not None:
             log = f'!Створення асоціації: {sourceClassData.name} -> {targetClassData.name}'
-            print(log)
-            self.logger.info(log)
-            association_id = self._generate_id()
+            self._report(log)
+            self.arrows_added.append(f"{sourceClassData.name} -> {targetClassData.name}")
+            association_id = self._generate_id("association", f"{sourceClassData.class_id}->{targetClassData.class_id}")
             association_cell = self._add_cell_to_model(
                 cell_id=association_id,
                 value="",
@@ -458,9 +675,10 @@ class DiagramManager:
             mxPoint.set("as", "sourcePoint")
             mxPoint = ET.SubElement(mxGeometry, "mxPoint")
             mxPoint.set("as", "targetPoint")
+            self.get_edges().add(association_cell)
 
-    def set_extends(self, classData: ClassData, base_classData: ClassData):
-        """Встановлює наслідування між класами."""
+    def set_extends(self, base_classData: ClassData, classData: ClassData):
+        """Встановлює наслідування між класами (стрілка від класу до базового класу)."""
         """
         <mxCell id="yXxLP0Zb9wQtJZGc93Rl-249139961430" value="Extends" style="endArrow=block;endSize=16;endFill=0;html=1;rounded=0;" edge="1" parent="1" source="249139961429" target="242186206191">
           <mxGeometry width="160" relative="1" as="geometry">
@@ -470,9 +688,9 @@ class DiagramManager:
         </mxCell>
         """
         
-        arrow = self.find_arrow(base_classData, classData)
+        arrow = self.find_arrow(classData, base_classData, EDGE_EXTENDS)
         if arrow is not None:
-            self.logger.info("Стрілка наслідування між класами вже існує: " + base_classData.name + " -> " + classData.name)
+            self.logger.info("Стрілка наслідування між класами вже існує: " + classData.name + " -> " + base_classData.name)
             return
         
         class_cell = classData.class_user_object
@@ -480,16 +698,17 @@ class DiagramManager:
         
 
         if class_cell is not None and base_class_cell is not None:
-            self.logger.info(f"Створення стрілки наслідування: {base_classData.name} -> {classData.name}")
+            self.logger.info(f"Створення стрілки наслідування: {classData.name} -> {base_classData.name}")
 
-            extends_id = self._generate_id()
+            self.arrows_added.append(f"{classData.name} -> {base_classData.name}")
+            extends_id = self._generate_id("extends", f"{classData.class_id}->{base_classData.class_id}")
             extends_cell = self._add_cell_to_model(
                 cell_id=extends_id,
                 value="Extends",
                 style=self.extends_style,
                 parent="1",
-                source=base_classData.class_id,
-                target=classData.class_id,
+                source=classData.class_id,
+                target=base_classData.class_id,
                 edge="1"
             )
             # MxGeometry
@@ -501,42 +720,30 @@ class DiagramManager:
             mxPoint.set("as", "sourcePoint")
             mxPoint = ET.SubElement(mxGeometry, "mxPoint")
             mxPoint.set("as", "targetPoint")
+            self.get_edges().add(extends_cell)
         else:
-            self.logger.error("Не знайдено класу target: " + classData.name)
-            self.logger.error("Не знайдено класу source: " + base_classData.name)
+            self.logger.error("Не знайдено класу target: " + base_classData.name)
+            self.logger.error("Не знайдено класу source: " + classData.name)
 
-    def find_arrow(self, sourceClassData: ClassData, targetClassData: ClassData):
-        """Знаходить стрілку між класами."""
+    def index_edges(self, class_data_list : list[ClassData]):
+        """Будує сховище стрілок поточної сторінки. Викликається після того, як усі класи сторінки розміщено."""
+        self.edges = EdgeStore(self.root_obj, class_data_list)
 
-        source_cell = sourceClassData.class_user_object
-        target_cell = targetClassData.class_user_object
+    def get_edges(self) -> EdgeStore:
+        """Сховище стрілок поточної сторінки; якщо index_edges не викликали, будується з класів, розміщених set_data_in_class."""
+        if self.edges is None:
+            self.index_edges(self.page_classes)
+        return self.edges
+
+    def find_arrow(self, sourceClassData: ClassData, targetClassData: ClassData, kind : str = EDGE_ASSOCIATION):
+        """Знаходить стрілку виду kind від класу sourceClassData до класу targetClassData."""
 
-        if source_cell is None or target_cell is None:
+        if sourceClassData.class_user_object is None or targetClassData.class_user_object is None:
             self.logger.error("Не знайдено класу source: " + sourceClassData.name)
             self.logger.error("Не знайдено класу target: " + targetClassData.name)
             return None
-        
-        source_ids = [source_cell.attrib['id']]
-
-        if sourceClassData.first_child is not None:
-            source_ids.append(sourceClassData.first_child.attrib['id'])
-        if sourceClassData.second_child is not None:
-            source_ids.append(sourceClassData.second_child.attrib['id'])
-        
 
-        target_ids = [target_cell.attrib['id']]
-        if targetClassData.first_child is not None:
-            target_ids.append(targetClassData.first_child.attrib['id'])
-        if targetClassData.second_child is not None:
-            target_ids.append(targetClassData.second_child.attrib['id'])
-
-        for cell in self.root_obj.findall('mxCell'):
-            if 'source' in cell.attrib \
-                and 'target' in cell.attrib \
-                and cell.attrib['source'] in source_ids \
-                and cell.attrib['target'] in target_ids:
-                return cell
-        return None
+        return self.get_edges().get(kind, sourceClassData.class_id, targetClassData.class_id)
 
     def cleanup_classes(self, class_data_list : list[ClassData]):
         """Видаляє класи, які більше не існують у коді."""
@@ -544,7 +751,7 @@ class DiagramManager:
         classes_to_delete = []
         for userObj in self.root_obj.findall('UserObject'):
             cell = userObj.find('mxCell')
-            if cell is not None and 'style' in cell.attrib and self.class_style_identifier in cell.attrib['style']:
+            if cell is not None and style_kind(cell.get('style')) is CellKind.CLASS:
                 classes_to_delete.append(userObj)
 
         for class_data in class_data_list:
@@ -553,7 +760,8 @@ class DiagramManager:
                     classes_to_delete.remove(cell)
 
         for cell in classes_to_delete:
-            print(f"!Видаляємо клас: {cell.get('label')}")
+            self._report(f"!Видаляємо клас: {cell.get('label')}")
+            self.classes_removed.append(cell.get('label'))
             self.remove_class_and_children(cell.get('id'))
     
     def remove_class_and_children(self, classId : str):
@@ -576,149 +784,123 @@ class DiagramManager:
                 continue
 
 
-    def cleanup_associations(self, class_data_list : list[ClassData]):
-        """Видаляє асоціації, які більше не існують у коді."""
-        all_associations = []
-        
-        # Шукаємо всі двосторонні асоціації
-        for cell in self.root_obj.findall('mxCell'):
-            style = cell.get('style')
-            if style == self.double_association_style or style == self.association_style:
-                all_associations.append(cell)
-
-        # Перевіряємо, чи асоціація ще актуальна
-        for association in all_associations:
-            source_cell = self.find_user_object({'id': association.get('source')})
-            target_cell = self.find_user_object({'id': association.get('target')})
-            if source_cell is None or target_cell is None:
-                log = f"!Асоціація не має діаграмного елементу: {association.get('source')} -> {association.get('target')}"
-                print(log)
-                self.logger.error(log)
-                self.remove_cell(association)
+    def cleanup_arrows(self, class_data_list : list[ClassData]):
+        """Видаляє або виправляє асоціації та наслідування, які більше не відповідають коду (за один прохід)."""
+        classes_by_id = {class_data.class_id: class_data for class_data in class_data_list if class_data.class_id is not None}
+        edges = self.get_edges()
+        user_object_ids = {user_object.get('id') for user_object in self.root_obj.findall('UserObject')}
+
+        def resolve(cell_id):
+            # Повертає (клас, чого не вистачає стрілці)
+            class_data = classes_by_id.get(edges.owners.get(cell_id))
+            if class_data is not None:
+                return class_data, None
+            return None, "класу" if cell_id in user_object_ids else "діаграмного елементу"
+
+        for arrow in list(edges.cells):
+            kind = style_kind(arrow.get('style'))
+            if kind is CellKind.ASSOCIATION or kind is CellKind.DOUBLE_ASSOCIATION:
+                label = "Асоціація"
+            elif kind is CellKind.EXTENDS:
+                label = "Наслідування"
+            else:
                 continue
 
-            source_class_data = self.find_class_data_by_user_object(source_cell, class_data_list)
-            target_class_data = self.find_class_data_by_user_object(target_cell, class_data_list)
+            source_class_data, source_error = resolve(arrow.get('source'))
+            target_class_data, target_error = resolve(arrow.get('target'))
+            errors = {source_error, target_error}
+            error = "діаграмного елементу" if "діаграмного елементу" in errors else "класу" if "класу" in errors else None
+            if error is not None:
+                log = f"!{label} не має {error}: {arrow.get('source')} -> {arrow.get('target')}"
+                self._report(log, error=True)
+                self._remove_arrow(arrow, f"{arrow.get('source')} -> {arrow.get('target')}")
+                continue
 
-            if source_class_data is None or target_class_data is None:
-                log = f"!Асоціація не має класу: {association.get('source')} -> {association.get('target')}"
-                print(log)
-                self.logger.error(log)
-                self.remove_cell(association)
+            if label == "Наслідування":
+                # Стрілка наслідування йде від класу до базового класу
+                if source_class_data.base_class != target_class_data.name:
+                    log = f"!Не вірний батьківський клас: {source_class_data.base_class} -> {source_class_data.name}"
+                    self._report(log, error=True)
+                    self._remove_arrow(arrow, f"{arrow.get('source')} -> {arrow.get('target')}")
                 continue
 
             # Перевіряю, чи асоціація ще двостороння
-            find1 = source_class_data in target_class_data.associations
-            find2 = target_class_data in source_class_data.associations
+            find1 = target_class_data.has_association(source_class_data)
+            find2 = source_class_data.has_association(target_class_data)
             if find1 is False and find2 is False:
-                self.remove_cell(association)
+                self._remove_arrow(arrow, f"{source_class_data.name} -> {target_class_data.name}")
                 log = f"!Видаляєм асоціацію: {source_class_data.name} -> {target_class_data.name}"
-                print(log)
-                self.logger.error(log)
+                self._report(log, error=True)
             elif find1 is False:
-                if association.get('style') == self.double_association_style:
-                    association.set('style', self.association_style)
+                if kind is CellKind.DOUBLE_ASSOCIATION:
+                    self._restyle_association(arrow, self.association_style, start_arrow=None)
                     log = f"!Змінюємо на односторонню асоціацію: {source_class_data.name} -> {target_class_data.name}"
-                    print(log)
-                    self.logger.error(log)
+                    self._report(log, error=True)
             elif find2 is False:
-                association.set('style', self.association_style)
-                association.set('source', target_cell.get('id'))
-                association.set('target', source_cell.get('id'))
+                self._restyle_association(arrow, self.association_style, start_arrow=None)
+                arrow.set('source', target_class_data.class_id)
+                arrow.set('target', source_class_data.class_id)
+                edges.update(arrow)
                 
                 log = f"!Змінюємо на односторонню асоціацію: {target_class_data.name} -> {source_class_data.name}"
-                print(log)
-                self.logger.error(log)
+                self._report(log, error=True)
 
-    def cleanup_extends(self, class_data_list : list[ClassData]):
-        """Видаляє наслідування, які більше не існують у коді."""
-        
-        extends_to_delete = []
-        for cell in self.root_obj.findall('mxCell'):
-            if 'style' in cell.attrib and self.extends_style in cell.attrib['style']:
-                extends_to_delete.append(cell)
-        
-        for cell in extends_to_delete:
-            source_cell = self.find_user_object({'id': cell.get('source')})
-            target_cell = self.find_user_object({'id': cell.get('target')})
-            if source_cell is None or target_cell is None:
-                log = f"!Наслідування не має діаграмного елементу: {cell.get('source')} -> {cell.get('target')}"
-                print(log)
-                self.logger.error(log)
-                self.remove_cell(cell)
-                continue
-
-            base_class_data = self.find_class_data_by_user_object(target_cell, class_data_list)
-            class_data = self.find_class_data_by_user_object(source_cell, class_data_list)
-            if base_class_data is None or class_data is None:
-                log = f"!Наслідування не має класу: {cell.get('source')} -> {cell.get('target')}"
-                print(log)
-                self.logger.error(log)
-                self.remove_cell(cell)
-                continue
-
-            if class_data.base_class != base_class_data.name:
-                log = f"!Не вірний батьківський клас: {class_data.base_class} -> {class_data.name}"
-                print(log)
-                self.logger.error(log)
-                self.remove_cell(cell)
-                continue
+    def _restyle_association(self, arrow : ET.Element, style : str, start_arrow : str | None):
+        """
+        Змінює напрямок асоціації. Стандартний стиль замінюється стандартним, а в змінених
+        користувачем стилях (колір, товщина) змінюється лише ключ startArrow.
+        """
+        current = arrow.get('style', "")
+        if current in (self.association_style, self.double_association_style) or \
+                style_kind(current) not in (CellKind.ASSOCIATION, CellKind.DOUBLE_ASSOCIATION):
+            arrow.set('style', style)
+        else:
+            arrow.set('style', update_style(current, startArrow=start_arrow))
 
-    def find_class_data_by_user_object(self, userObject : ET.Element, class_data_list : list[ClassData]):
-        class_name = userObject.get('label')
-        for class_data in class_data_list:
-            if class_data.get_class_full_name() == class_name:
-                return class_data
-        return None
-
-    # Знаходить елемент за атрибутами та значеннями
-    def find_user_object(self, attributes : dict[str, str]):
-        """Знаходить елемент за атрибутом та значенням."""
-
-        for userObject in self.root_obj.findall('UserObject'):
-            is_match = True
-            for attr, value in attributes.items():
-                if userObject.get(attr) != value:
-                    is_match = False
-                    break
-            if is_match:
-                return userObject
-        return None
+    def _remove_arrow(self, arrow : ET.Element, description : str):
+        """Видаляє стрілку та записує її у статистику змін."""
+        self.remove_cell(arrow)
+        self.arrows_removed.append(description)
 
     def remove_cell(self, cell):
         """Видаляє комірку з моделі."""
         if cell in self.root_obj:
             self.root_obj.remove(cell)
+            self.ids.discard(cell.get('id'))
+            if self.edges is not None:
+                self.edges.discard(cell)
+
+    def is_normalized(self) -> bool:
+        """Перевіряє, чи діаграма вже збережена цим скриптом у поточному форматі."""
+        return self.mxgraph_model is not None and self.mxgraph_model.get(FORMAT_VERSION_ATTR) == FORMAT_VERSION
 
     def megrate_to_user_object(self):
-        """Переводить діаграму в об'єкт для користувача."""
+        """
+        Переводить діаграму в об'єкт для користувача.
 
-        def copy_children(from_cell : ET.Element, to_cell : ET.Element):
-            for child in from_cell:
-                newChild = ET.SubElement(to_cell, child.tag, child.attrib)
-                copy_children(child, newChild)
+        Виконується за один прохід і лише для діаграм без позначки формату:
+        draw.io не зберігає невідомі атрибути mxGraphModel, тому після редагування
+        діаграми у draw.io позначка зникає і міграція виконується знову.
+        """
+        if self.is_normalized():
+            return
 
-        cells = self.root_obj.findall('mxCell')
-        for cell in cells:
-            if not 'value' in cell.attrib or cell.attrib['value'] == "":
+        for index, cell in enumerate(self.root_obj):
+            if cell.tag != 'mxCell' or not cell.get('value'):
                 continue
-            if not 'style' in cell.attrib or ('endArrow' or 'startArrow') in cell.attrib['style']:
+            style = cell.get('style')
+            if style is None or parse_style(style).is_edge:
                 continue
             self.logger.info(f"Міграція елементу: {cell.get('value')}")
             
-            userObject = ET.SubElement(self.root_obj, 'UserObject', {'id': cell.get('id'), 'label': cell.get('value')})
+            userObject = ET.Element('UserObject', {'id': cell.get('id'), 'label': cell.get('value')})
             userObject.set('tooltip', 'Test tooltip')
-            
-            newSubCell = ET.SubElement(userObject, 'mxCell', cell.attrib)
-            newSubCell.attrib.pop('value')
-            newSubCell.attrib.pop('id')
-
-            copy_children(cell, newSubCell)
+            userObject.tail = cell.tail
 
-        for cell in cells:
-            if not 'value' in cell.attrib or cell.attrib['value'] == "":
-                continue
-            if not 'style' in cell.attrib or ('endArrow' or 'startArrow') in cell.attrib['style']:
-                continue
-            self.root_obj.remove(cell)
+            # Переносимо саму клітинку всередину UserObject без копіювання дітей
+            cell.attrib.pop('value')
+            cell.attrib.pop('id')
+            userObject.append(cell)
+            self.root_obj[index] = userObject
 
+        self.mxgraph_model.set(FORMAT_VERSION_ATTR, FORMAT_VERSION)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import xml.etree.ElementTree as ET
+
+from class_data import ClassData
+from style_cache import CellKind, style_kind
+
+
+# Види стрілок у сховищі. До асоціацій належать також двосторонні асоціації
+# та стрілки з невідомим стилем, намальовані користувачем між класами
+EDGE_ASSOCIATION = "association"
+EDGE_EXTENDS = "extends"
+
+
+class EdgeStore:
+    """
+    Індекс стрілок сторінки діаграми за видом стрілки та парою класів.
+
+    Кінці стрілок зводяться до id класу: стрілка, прив'язана до рядка полів або методів,
+    належить класу цього рядка. Пошук, додавання, розворот і видалення стрілки - O(1).
+    """
+
+    def __init__(self, root_obj : ET.Element, class_data_list : list[ClassData]):
+        # id класу або його рядка -> id класу
+        self.owners : dict[str, str] = {}
+        for class_data in class_data_list:
+            if class_data.class_id is None:
+                continue
+            self.owners[class_data.class_id] = class_data.class_id
+            for child in (class_data.first_child, class_data.second_child):
+                if child is not None:
+                    self.owners[child.get('id')] = class_data.class_id
+
+        # (вид, id класу source, id класу target) -> стрілки у порядку документа
+        self._edges : dict[tuple[str, str, str], list[ET.Element]] = {}
+        self._keys : dict[ET.Element, tuple[str, str, str]] = {}
+        # Усі стрілки сторінки у порядку документа, включно з тими, чиї кінці не є класами
+        self.cells : dict[ET.Element, None] = {}
+
+        for cell in root_obj.findall('mxCell'):
+            if 'source' in cell.attrib or 'target' in cell.attrib or cell.get('edge') == "1":
+                self.add(cell)
+
+    def kind_of(self, cell : ET.Element) -> str:
+        """Вид стрілки за її стилем (з кешу розібраних стилів)."""
+        return EDGE_EXTENDS if style_kind(cell.get('style')) is CellKind.EXTENDS else EDGE_ASSOCIATION
+
+    def key_of(self, cell : ET.Element) -> tuple[str, str, str] | None:
+        """Ключ стрілки у сховищі або None, якщо хоча б один її кінець не є класом."""
+        source = self.owners.get(cell.get('source'))
+        target = self.owners.get(cell.get('target'))
+        if source is None or target is None:
+            return None
+        return (self.kind_of(cell), source, target)
+
+    def add(self, cell : ET.Element):
+        """Додає стрілку до сховища."""
+        self.cells[cell] = None
+        key = self.key_of(cell)
+        if key is not None:
+            self._edges.setdefault(key, []).append(cell)
+            self._keys[cell] = key
+
+    def discard(self, cell : ET.Element):
+        """Прибирає стрілку зі сховища (якщо її там немає - нічого не робить)."""
+        self.cells.pop(cell, None)
+        key = self._keys.pop(cell, None)
+        if key is not None:
+            edges = self._edges[key]
+            edges.remove(cell)
+            if not edges:
+                del self._edges[key]
+
+    def update(self, cell : ET.Element):
+        """Оновлює ключ стрілки після зміни її кінців або стилю."""
+        self.discard(cell)
+        self.add(cell)
+
+    def get(self, kind : str, source_id : str, target_id : str) -> ET.Element | None:
+        """Перша (у порядку документа) стрілка виду kind від класу source_id до класу target_id."""
+        edges = self._edges.get((kind, source_id, target_id))
+        return edges[0] if edges else None
@@ -1,78 +1,248 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from __future__ import annotations
+
+import io
 import os
 import sys
-import xml.etree.ElementTree as ET
-from pathlib import Path
 import argparse
-import glob
-import logging
+import time
+from collections.abc import Callable, Iterable
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field, replace
 
-# Імпортуємо класи з diagram_manager.py
-from diagram_manager import DiagramManager, ClassData
+from progress import CancelToken, UpdateCancelled, jsonl_progress_writer
+from run_state import RunState
+from script_log import get_logger, logger, set_log_file
+from version import FORMAT_VERSION, GENERATOR_REVISION
 
-# Налаштування логування
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), "Log.log"),
-    encoding='utf-8',  # Додаємо явне вказання кодування UTF-8
-    filemode='w'  # Режим 'w' перезаписує файл при кожному запуску
-)
-logger = logging.getLogger()
+# typing.TYPE_CHECKING без імпорту typing: анотації тут не обчислюються (from __future__ import annotations)
+TYPE_CHECKING = False
 
+# Модулі роботи з діаграмою імпортуються у функціях, які їх використовують: запуск,
+# коли нічого не змінилося, завершується до їх імпорту (див. main)
+if TYPE_CHECKING:
+    from diagram_manager import DiagramManager, ClassData
+    from diagram_io import DiagramWriter, PrefetchedInput
+    from name_filter import NameFilter
 
-def parse_xml_to_class_data(xml_path) -> list[ClassData]:
-    """Парсить XML файл з описом класів і повертає список об'єктів ClassData."""
-    try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        
-        class_data_list = []
-        
-        # Проходимо по всім класам у XML
-        for class_elem in root.findall('.//Class'):
-            name = class_elem.get('n').replace("<", "&lt;").replace(">", "&gt;")
-            base_class =  class_elem.get('b')
-            class_tooltip = class_elem.get('c', "")
-            
-            class_data = ClassData(name=name, base_class=base_class, class_tooltip=class_tooltip)
+
+def get_script_dir() -> str:
+    """Папка скрипта; для zipapp - папка, в якій лежить архів."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    if not os.path.isdir(script_dir):
+        script_dir = os.path.dirname(script_dir)
+    return script_dir
+
+
+def setup_logging():
+    """
+    Налаштовує логування у файл Log.log поруч зі скриптом.
+
+    Файл відкривається (і перезаписується) лише при першому записі в лог,
+    тому запуск, коли нічого не змінилося, не чіпає файл (див. script_log).
+    """
+    set_log_file(os.path.join(get_script_dir(), "Log.log"))
+
+
+@dataclass
+class UpdateOptions:
+    """Параметри оновлення діаграм."""
+    cleanup_classes: bool = False
+    cleanup_arrows: bool = False
+    # Друкувати хід роботи у stdout (як це робить CLI)
+    verbose: bool = False
+    # Читати наступний файл та записувати діаграми у фонових потоках
+    pipeline: bool = False
+    # Скільки готових діаграм може чекати на запис у режимі pipeline
+    write_queue_size: int = 2
+    # Максимум класів на сторінці (0 - без розбиття на сторінки)
+    max_classes_per_page: int = 0
+    # Як групувати класи при розбитті: "component" (зв'язані класи разом) або "namespace"
+    shard_by: str = "component"
+    # Максимум символів підказки одного члена класу (0 - без обмеження)
+    tooltip_max_chars: int = 0
+    # Максимум символів підказки всього блоку полів або методів (0 - без обмеження)
+    tooltip_max_item_chars: int = 0
+    # Коротші відступи у підказках (&emsp; замість чотирьох &nbsp;)
+    compact_tooltips: bool = False
+    # Будувати підказки лише для нових та змінених полів і методів, незмінні зберігають підказку з діаграми
+    tooltips_changed_only: bool = False
+    # Вимірювати пам'ять кожної фази через tracemalloc (файли обробляються послідовно)
+    profile_memory: bool = False
+    # Скільки місць виділення пам'яті зберігати для кожної фази
+    profile_memory_top: int = 10
+    # Обмеження часу на весь запуск у секундах (0 - без обмеження). Файли впорядковуються за часом зміни,
+    # робота зупиняється між файлами, а пропущені файли обробляються першими наступного разу
+    time_budget: float = 0
+    # Обробник подій прогресу (словники з полем "event"), див. README
+    progress: Callable[[dict], None] | None = None
+    # Скасування: перевіряється між фазами та файлами
+    cancel_token: CancelToken | None = None
+    # Обчислювати метрики архітектури (потрібен NumPy)
+    report: bool = False
+    # Скільки найбільш зв'язаних класів включати у звіт
+    report_top: int = 20
+    # Фільтр імен класів (коротке ім'я або з простором імен); відфільтровані класи не розбираються
+    class_filter: NameFilter | None = None
+    # Фільтр імен вхідних XML файлів
+    file_filter: NameFilter | None = None
+    # Скорочувати мітки класів, у яких більше членів (полів і методів разом), ніж задано (0 - не скорочувати)
+    summarize_over: int = 0
+    # Скільки членів показувати у кожному блоці скороченого класу
+    summary_top: int = 10
+    # Показувати у скороченому класі лише публічні члени
+    summary_public_only: bool = False
+    # Процеси для рендерингу міток і розмірів класів великої сторінки (1 - в основному процесі, 0 - усі ядра)
+    render_jobs: int = 1
+    # Виводи з однієї розібраної моделі: "drawio" (оновлення діаграми), "json" (граф класів), "plantuml"
+    sinks: tuple[str, ...] = ("drawio",)
+
+    def output_key(self) -> str:
+        """Версія генератора та параметри, від яких залежить вміст діаграми: якщо вони змінилися, діаграму треба оновити."""
+        return (f"{FORMAT_VERSION}.{GENERATOR_REVISION};{self.cleanup_classes:d}{self.cleanup_arrows:d};{self.max_classes_per_page};{self.shard_by};"
+                f"{self.tooltip_max_chars};{self.tooltip_max_item_chars};{self.compact_tooltips:d}{self.tooltips_changed_only:d};"
+                f"{self.class_filter.key() if self.class_filter else ''};{','.join(self.sinks)};"
+                f"{self.summarize_over};{self.summary_top};{self.summary_public_only:d}")
+
+
+@dataclass
+class UpdateResult:
+    """Результат оновлення однієї діаграми."""
+    input_path: str
+    output_path: str
+    success: bool = False
+    # True, якщо оновлення скасовано до запису діаграми
+    cancelled: bool = False
+    # True, якщо файл пропущено через обмеження часу (options.time_budget)
+    skipped: bool = False
+    error: str | None = None
+    class_count: int = 0
+    classes_added: list[str] = field(default_factory=list)
+    classes_removed: list[str] = field(default_factory=list)
+    arrows_added: list[str] = field(default_factory=list)
+    arrows_removed: list[str] = field(default_factory=list)
+    bytes_written: int = 0
+    # Тривалість кожної фази у секундах
+    timings: dict[str, float] = field(default_factory=dict)
+    # Пам'ять кожної фази (див. PhaseMemoryProfiler), якщо увімкнено options.profile_memory
+    memory: dict[str, dict] | None = None
+    # Метрики архітектури (див. ClassGraph.report), якщо увімкнено options.report
+    report: dict | None = None
+    # Записані файли додаткових виводів (JSON, PlantUML)
+    exports: list[str] = field(default_factory=list)
+
+
+# Кеш розібраних моделей: шлях -> ((mtime_ns, розмір, фільтр), список ClassData, імена відфільтрованих класів)
+_model_cache: dict[str, tuple[tuple[int, int, str], list[ClassData], set[str]]] = {}
+
+
+def parse_xml_to_class_data(xml_source, class_filter : NameFilter | None = None,
+                            external_names : set[str] | None = None) -> list[ClassData] | None:
+    """
+    Парсить XML файл (шлях або файловий об'єкт) з описом класів і повертає список об'єктів ClassData
+    у порядку документа, або None, якщо файл не вдалося розібрати.
+
+    Файл читається потоково (expat), без побудови дерева елементів: class_filter перевіряється
+    на початку елемента Class, вміст відфільтрованого класу пропускається, а його ім'я додається
+    до external_names, щоб пошук асоціацій знав його як зовнішнє.
+    Порожній список означає, що файл розібрано, але класів у ньому немає або всі відфільтровано.
+    """
+    from xml.parsers import expat
+    from class_data import ClassData
+
+    class_data_list = []
+    filtered_count = 0
+    # Відкриті елементи; повні імена просторів імен; відкриті класи з їх глибиною у tags
+    tags : list[str] = []
+    namespaces = [""]
+    classes : list[tuple[ClassData, int]] = []
+    # Глибина всередині відфільтрованого класу (0 - поза ним)
+    skip_depth = 0
+
+    def member_owner(container : str) -> ClassData | None:
+        # Поле чи метод належить класу, лише якщо лежить у його Fields/Methods
+        if len(tags) >= 2 and tags[-1] == container and classes and classes[-1][1] == len(tags) - 2:
+            return classes[-1][0]
+        return None
+
+    def start_element(tag : str, attributes : dict[str, str]):
+        nonlocal skip_depth, filtered_count
+        if skip_depth:
+            skip_depth += 1
+            return
+
+        if tag == 'Field':
+            class_data = member_owner('Fields')
+            if class_data is not None:
+                class_data.append_field(attributes.get('v'), attributes.get('c'))
+        elif tag == 'Method':
+            class_data = member_owner('Methods')
+            if class_data is not None:
+                class_data.append_method(attributes.get('v'), attributes.get('c'))
+        elif tag == 'Class' and tags:
+            raw_name = attributes.get('n')
+            name = raw_name.replace("<", "&lt;").replace(">", "&gt;")
+            if class_filter and not class_filter.matches(raw_name, f"{namespaces[-1]}.{raw_name}" if namespaces[-1] else raw_name):
+                filtered_count += 1
+                if external_names is not None:
+                    external_names.add(name)
+                skip_depth = 1
+                return
+            class_data = ClassData(name=name, base_class=attributes.get('b'), class_tooltip=attributes.get('c', ""))
             class_data_list.append(class_data)
+            classes.append((class_data, len(tags)))
             logger.info(f"Додано клас: {class_data.name}")
-            
-            # Збираємо поля
-            fields_elem = class_elem.find('Fields')
-            if fields_elem is not None:
-                field_items = fields_elem.findall('Field')
-                if field_items:
-                    for field in field_items:
-                        class_data.append_field(field.get('v'), field.get('c', None))
-                logger.info(f"Додано поля для класу: {class_data.name}")
-
-            # Збираємо методи
-            methods_elem = class_elem.find('Methods')
-            if methods_elem is not None:
-                method_items = methods_elem.findall('Method')
-                if method_items:
-                    for method in method_items:
-                        class_data.append_method(method.get('v'), method.get('c', None))
-                    logger.info(f"Додано методи для класу: {class_data.name}")
-        return class_data_list
-    
+        elif tag == 'Namespace':
+            name = attributes.get('n')
+            namespace = namespaces[-1]
+            namespaces.append((f"{namespace}.{name}" if namespace else name) if name else namespace)
+        tags.append(tag)
+
+    def end_element(tag : str):
+        nonlocal skip_depth
+        if skip_depth:
+            skip_depth -= 1
+            return
+
+        tags.pop()
+        if tag == 'Class' and classes and classes[-1][1] == len(tags):
+            classes.pop()
+        elif tag == 'Namespace':
+            namespaces.pop()
+        elif tag == 'Fields' and classes and classes[-1][1] == len(tags) - 1:
+            logger.info(f"Додано поля для класу: {classes[-1][0].name}")
+        elif tag == 'Methods' and classes and classes[-1][1] == len(tags) - 1 and classes[-1][0].method_items:
+            logger.info(f"Додано методи для класу: {classes[-1][0].name}")
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    try:
+        if hasattr(xml_source, 'read'):
+            parser.ParseFile(xml_source)
+        else:
+            with open(xml_source, 'rb') as f:
+                parser.ParseFile(f)
     except Exception as e:
         logger.error(f"Помилка при парсингу XML: {e}")
-        return []
+        return None
 
-def find_class_data_by_name(class_data_list, name):
-    """Знаходить об'єкт ClassData за іменем класу."""
-    for class_data in class_data_list:
-        if class_data.name == name:
-            return class_data
-    return None
+    if class_filter:
+        logger.info(f"Фільтр класів: залишено {len(class_data_list)}, пропущено {filtered_count}")
+    return class_data_list
+
+def find_associations(class_data_list : list[ClassData], external_names : set[str] | None = None):
+    """
+    Знаходить асоціації між класами на основі типів полів.
 
-def find_associations(class_data_list : list[ClassData]):
-    """Знаходить асоціації між класами на основі типів полів."""
+    Типи з external_names (відфільтровані класи) записуються у external_associations класу, а не в associations.
+    """
+    # Класи за іменем (при однакових іменах - перший, як і раніше)
+    by_name : dict[str, ClassData] = {}
+    for class_data in class_data_list:
+        by_name.setdefault(class_data.name, class_data)
     
     def process_type(type_str, source_class, depth=0):
         """Рекурсивно обробляє тип та його дженерік-параметри.
@@ -84,13 +254,18 @@ def find_associations(class_data_list : list[ClassData]):
         """
         # Обробляємо базовий тип
         clean_type = type_str.split("(")[0].split("[")[0].strip()
-        target_class = find_class_data_by_name(class_data_list, clean_type)
+        target_class = by_name.get(clean_type)
         if target_class and target_class != source_class:
             # Перевіряємо, чи вже існує така асоціація в списку асоціацій вихідного класу
             if target_class not in source_class.associations:
                 source_class.associations.append(target_class)
                 logger.info(f"Додано асоціацію: {source_class.name} -> {target_class.name}")
             return
+        if external_names and clean_type in external_names:
+            if clean_type not in source_class.external_associations:
+                source_class.external_associations.append(clean_type)
+                logger.info(f"Асоціація з відфільтрованим класом: {source_class.name} -> {clean_type}")
+            return
         
         # Якщо є дженерік-параметри, обробляємо їх
         if "&lt;" in type_str and "&gt;" in type_str:
@@ -122,11 +297,8 @@ def find_associations(class_data_list : list[ClassData]):
     # Головний цикл для обробки всіх класів
     for source_class in class_data_list:
         
-        if not source_class.fields:
-            continue
-        
-        # Розбиваємо поля на рядки
-        field_lines = source_class.fields.split("<br/>")
+        # Повний список полів (мітка великого класу може бути скороченою, див. ClassData.summarize)
+        field_lines = [field for field, _, _ in source_class.field_items]
         
         for field_line in field_lines:
             # Шукаємо тип поля (після двокрапки)
@@ -138,69 +310,520 @@ def find_associations(class_data_list : list[ClassData]):
                 process_type(field_type, source_class)
     
 
-def create_uml_diagram(class_data_list : list[ClassData], output_path, cleanup_classes, cleanup_arrows):
-    """Створює UML діаграму на основі списку об'єктів ClassData."""
+def load_class_data(xml_path, prefetched : PrefetchedInput | None = None, class_filter : NameFilter | None = None,
+                    external_names : set[str] | None = None) -> list[ClassData] | None:
+    """
+    Повертає модель класів для XML файлу (None, якщо файл не вдалося розібрати; порожній список,
+    якщо класів немає або всі відфільтровано).
+
+    Якщо файл і фільтр не змінилися з попереднього виклику, повторно використовує вже розібрану модель.
+    Імена відфільтрованих класів додаються до external_names.
+    """
+    path = os.path.abspath(xml_path)
+    stat = prefetched.xml_stat if prefetched is not None else os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size, class_filter.key() if class_filter else "")
+
+    cached = _model_cache.get(path)
+    if cached is not None and cached[0] == key:
+        for class_data in cached[1]:
+            class_data.reset_diagram_state()
+        if external_names is not None:
+            external_names.update(cached[2])
+        return cached[1]
+
+    filtered_names = set()
+    if prefetched is not None:
+        class_data_list = parse_xml_to_class_data(io.BytesIO(prefetched.xml_content), class_filter, filtered_names)
+    else:
+        class_data_list = parse_xml_to_class_data(path, class_filter, filtered_names)
+    if class_data_list is not None:
+        _model_cache[path] = (key, class_data_list, filtered_names)
+    if external_names is not None:
+        external_names.update(filtered_names)
+    return class_data_list
+
+def clear_model_cache():
+    """Очищає кеш розібраних моделей."""
+    _model_cache.clear()
+
+def emit_progress(options : UpdateOptions, event : str, **fields):
+    """Передає подію прогресу обробнику options.progress, якщо він заданий."""
+    if options.progress is not None:
+        options.progress({'event': event, **fields})
+
+def check_cancelled(options : UpdateOptions):
+    """Кидає UpdateCancelled, якщо оновлення скасовано."""
+    if options.cancel_token is not None:
+        options.cancel_token.raise_if_cancelled()
+
+@contextmanager
+def measure_phase(result : UpdateResult, name : str, options : UpdateOptions):
+    """
+    Виконує фазу оновлення: перед нею перевіряє скасування, після - повідомляє про прогрес.
+
+    Тривалість фази записується у result.timings, а з profile_memory - ще й пам'ять фази у result.memory.
+    """
+    check_cancelled(options)
+    profiling = result.memory is not None and options.profile_memory
+    if profiling:
+        from memory_profile import PhaseMemoryProfiler
+    with PhaseMemoryProfiler(result.memory, options.profile_memory_top).phase(name) if profiling else nullcontext():
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            result.timings[name] = time.perf_counter() - start
+    emit_progress(options, "phase", file=os.path.basename(result.input_path), phase=name,
+                  seconds=round(result.timings[name], 3))
+
+def update_page(manager : DiagramManager, class_data_list : list[ClassData], options : UpdateOptions):
+    """Оновлює поточну сторінку діаграми: класи, стрілки наслідування та асоціацій."""
+    from render_pool import RenderSettings, render_classes
+    from sharding import ClassStub
+
+    manager.megrate_to_user_object()
+
+    for class_data in class_data_list:
+        check_cancelled(options)
+        class_data.load_data_from_diagram(manager.root_obj)
+
+    # Рендеринг: мітки, підказки та розміри класів, без змін у дереві діаграми
+    rendered = [class_data for class_data in class_data_list if not isinstance(class_data, ClassStub)]
+    # Незмінні члени - ті, що вже показані на діаграмі до оновлення; їх підказки не перебудовуються
+    known_tooltips = [class_data.get_diagram_tooltips() for class_data in rendered] if options.tooltips_changed_only else None
+    render_classes(rendered, RenderSettings.from_options(options), options.render_jobs, known_tooltips,
+                   lambda: check_cancelled(options))
+
+    # Класи сторінки за іменем (для заглушок ім'я збігається з ім'ям справжнього класу)
+    by_name : dict[str, ClassData] = {}
+    for class_data in class_data_list:
+        by_name.setdefault(class_data.name, class_data)
+
+    def is_stub_pair(a : ClassData, b : ClassData) -> bool:
+        # Зв'язки між двома заглушками належать іншим сторінкам
+        return isinstance(a, ClassStub) and isinstance(b, ClassStub)
+    
+    # Додаємо класи до діаграми з уже обчисленими мітками та розмірами
+    for class_data in class_data_list:
+        check_cancelled(options)
+        manager.set_data_in_class(class_data)
+        if isinstance(class_data, ClassStub):
+            manager.set_page_link(class_data.class_user_object, class_data.page_name)
+
+    # Індексуємо стрілки сторінки, коли вже відомі id усіх класів та їх рядків
+    manager.index_edges(class_data_list)
+    
+    # Додаємо зв'язки наслідування між класами
+    for class_data in class_data_list:
+        if class_data.base_class:
+            base_class_data = by_name.get(class_data.base_class)
+            if base_class_data and not is_stub_pair(base_class_data, class_data):
+                manager.set_extends(base_class_data, class_data)
+    
+    # Додаємо асоціації між класами
+    for class_data in class_data_list:
+        for target_class in class_data.associations:
+            target_class = by_name.get(target_class.name)
+            if target_class is not None and not is_stub_pair(class_data, target_class):
+                manager.set_association(class_data, target_class)
+
+    if options.cleanup_classes:
+        manager.cleanup_classes(class_data_list)
+    if options.cleanup_arrows:
+        manager.cleanup_arrows(class_data_list)
+
+def update_pages(manager : DiagramManager, class_data_list : list[ClassData], options : UpdateOptions, echo):
+    """Оновлює діаграму: одну сторінку або, якщо задано max_classes_per_page, кілька сторінок."""
+    if options.max_classes_per_page > 0:
+        from sharding import plan_shards
+        # Розбиваємо класи на сторінки, зв'язки між сторінками показуємо заглушками
+        shards = plan_shards(class_data_list, options.max_classes_per_page, manager.find_class_pages(),
+                             manager.page_names(), options.shard_by)
+        # Спершу створюємо всі сторінки, щоб заглушки могли на них посилатися
+        for shard in shards:
+            manager.select_page(shard.page_name)
+        for shard in shards:
+            check_cancelled(options)
+            echo(f"Сторінка {shard.page_name}: {len(shard.classes)} класів, {len(shard.stubs)} посилань")
+            if manager.select_page(shard.page_name):
+                update_page(manager, shard.all_classes(), options)
+    else:
+        update_page(manager, class_data_list, options)
+
+def analyze_class_data(class_data_list : list[ClassData], options : UpdateOptions, result : UpdateResult,
+                       external_names : set[str] | None = None):
+    """Знаходить асоціації між класами і, якщо увімкнено options.report, рахує метрики архітектури."""
+    with measure_phase(result, "associations", options):
+        find_associations(class_data_list, external_names)
+
+    if options.report:
+        # NumPy потрібен лише для звіту, тому імпортуємо модуль тільки тут
+        from class_graph import ClassGraph
+        with measure_phase(result, "report", options):
+            result.report = ClassGraph.from_class_data(class_data_list).report(options.report_top)
+
+def write_exports(class_data_list : list[ClassData], xml_path, output_dir, options : UpdateOptions, result : UpdateResult, echo):
+    """Записує додаткові виводи (JSON, PlantUML) з тієї самої моделі, для якої вже знайдено асоціації."""
+    from diagram_io import write_diagram_file
+    from sinks import SINK_DRAWIO, get_export_path, render_export
+
+    with measure_phase(result, "export", options):
+        for sink in options.sinks:
+            if sink == SINK_DRAWIO:
+                continue
+            export_path = get_export_path(xml_path, output_dir, sink)
+            write_diagram_file(export_path, render_export(sink, class_data_list, xml_path))
+            result.exports.append(export_path)
+            echo(f"Збережено {sink}: {export_path}")
+
+def create_uml_diagram(class_data_list : list[ClassData], output_path, options : UpdateOptions, result : UpdateResult | None = None,
+                       diagram_content : bytes | None = None, writer : DiagramWriter | None = None,
+                       external_names : set[str] | None = None):
+    """
+    Створює UML діаграму на основі списку об'єктів ClassData.
+
+    external_names - імена класів, відфільтрованих options.class_filter (див. find_associations).
+
+    Якщо передано writer, готова діаграма ставиться у чергу на запис у фоновому потоці,
+    а результат запису дописується у result, коли writer його обробить.
+    """
+    if result is None:
+        result = UpdateResult(input_path="", output_path=output_path)
+    echo = print if options.verbose else lambda *args: None
+
     try:
+        from diagram_manager import DiagramManager
+
         # Ініціалізуємо менеджер діаграм
-        manager = DiagramManager(logger)
+        manager = DiagramManager(get_logger(), verbose=options.verbose)
         
         # Відкриваємо існуючу діаграму або створюємо нову
-        if not manager.open_diagram_or_create(output_path):
-            print(f"Не вдалося відкрити або створити діаграму: {output_path}")
+        with measure_phase(result, "open", options):
+            opened = manager.open_diagram_or_create(output_path, diagram_content)
+        if not opened:
+            result.error = f"Не вдалося відкрити або створити діаграму: {output_path}"
+            echo(result.error)
             return False
-        
-        manager.megrate_to_user_object()
 
-        for class_data in class_data_list:
-            class_data.load_data_from_diagram(manager.root_obj)
-        
         # Спочатку знаходимо всі асоціації між класами
-        find_associations(class_data_list)
-        
-        # Додаємо класи до діаграми
-        for class_data in class_data_list:
-            manager.set_data_in_class(class_data)
-        
-        # Додаємо зв'язки наслідування між класами
-        for class_data in class_data_list:
-            if class_data.base_class:
-                base_class_data = find_class_data_by_name(class_data_list, class_data.base_class)
-                if base_class_data:
-                    manager.set_extends(base_class_data, class_data)
-        
-        # Додаємо асоціації між класами
-        for class_data in class_data_list:
-            for target_class in class_data.associations:
-                manager.set_association(class_data, target_class)
+        analyze_class_data(class_data_list, options, result, external_names)
+
+        with measure_phase(result, "update", options):
+            update_pages(manager, class_data_list, options, echo)
 
-        if cleanup_classes:
-            manager.cleanup_classes(class_data_list)
-        if cleanup_arrows:
-            manager.cleanup_associations(class_data_list)
-            manager.cleanup_extends(class_data_list)
+        result.classes_added = manager.classes_added
+        result.classes_removed = manager.classes_removed
+        result.arrows_added = manager.arrows_added
+        result.arrows_removed = manager.arrows_removed
         
         # Зберігаємо діаграму
-        if manager.save_diagram():
-            print(f"Діаграма успішно збережена: {output_path}")
+        with measure_phase(result, "serialize", options):
+            content = manager.serialize_diagram()
+        if writer is not None:
+            writer.submit(manager.filepath, content, result)
+            return True
+
+        with measure_phase(result, "save", options):
+            saved = manager.save_diagram(content)
+        if saved:
+            result.bytes_written = manager.bytes_written
+            echo(f"Діаграма успішно збережена: {output_path}")
             return True
         else:
-            print(f"Не вдалося зберегти діаграму: {output_path}")
+            result.error = f"Не вдалося зберегти діаграму: {output_path}"
+            echo(result.error)
             return False
     
+    except UpdateCancelled:
+        raise
     except Exception as e:
-        print(f"Помилка при створенні UML діаграми: {e}")
+        result.error = f"Помилка при створенні UML діаграми: {e}"
+        echo(result.error)
         return False
 
+def get_output_path(xml_path, output_dir) -> str:
+    """Повертає повний шлях до файлу drawio для вхідного XML."""
+    # Отримуємо ім'я файлу без шляху та розширення
+    file_name_without_ext = os.path.splitext(os.path.basename(xml_path))[0]
+    return os.path.abspath(os.path.join(output_dir, f"{file_name_without_ext}.drawio"))
+
+def update_file(xml_path, output_dir, options : UpdateOptions,
+                prefetched : PrefetchedInput | None = None, writer : DiagramWriter | None = None) -> UpdateResult:
+    """Оновлює діаграму для одного XML файлу."""
+    echo = print if options.verbose else lambda *args: None
+
+    file_name = os.path.basename(xml_path)
+    output_path = get_output_path(xml_path, output_dir)
+    result = UpdateResult(input_path=xml_path, output_path=output_path)
+    if options.profile_memory:
+        result.memory = {}
+    
+    echo(f"\nОбробка файлу: {file_name}")
+    emit_progress(options, "file", file=file_name)
+    
+    try:
+        # Парсимо XML і отримуємо список об'єктів ClassData
+        with measure_phase(result, "parse", options):
+            external_names = set()
+            class_data_list = load_class_data(xml_path, prefetched, options.class_filter, external_names)
+        
+        if class_data_list:
+            result.class_count = len(class_data_list)
+            echo(f"Знайдено {len(class_data_list)} класів у файлі {file_name}.")
+            
+            if "drawio" in options.sinks:
+                # Створюємо UML діаграму
+                diagram_content = prefetched.diagram_content if prefetched is not None else None
+                result.success = create_uml_diagram(class_data_list, output_path, options, result, diagram_content, writer, external_names)
+            else:
+                analyze_class_data(class_data_list, options, result, external_names)
+                result.success = True
+
+            # Інші виводи використовують ту саму модель та вже знайдені асоціації
+            if result.success and any(sink != "drawio" for sink in options.sinks):
+                try:
+                    write_exports(class_data_list, xml_path, output_dir, options, result, echo)
+                except OSError as e:
+                    result.success = False
+                    result.error = f"Не вдалося зберегти додатковий вивід: {e}"
+                    echo(result.error)
+        elif class_data_list is not None:
+            # Файл розібрано, але всі класи відфільтровано (або їх немає): діаграма не потрібна
+            result.success = True
+            echo(f"У файлі {file_name} немає класів після фільтрації, діаграму не оновлено.")
+        else:
+            result.error = f"Не вдалося отримати дані про класи з файлу {file_name}."
+            echo(result.error)
+    except UpdateCancelled:
+        result.cancelled = True
+        result.error = f"Оновлення скасовано: {file_name}"
+        echo(result.error)
+    except OSError as e:
+        # Відсутній або недоступний файл не зупиняє обробку інших файлів
+        result.success = False
+        result.error = f"Не вдалося прочитати файл {file_name}: {e}"
+        logger.error(result.error)
+        echo(result.error)
+
+    emit_progress(options, "file_done", file=file_name, success=result.success, cancelled=result.cancelled,
+                  classes=result.class_count)
+    return result
+
+def collect_xml_files(inputs : str | Iterable[str]) -> list[str]:
+    """Розгортає список вхідних шляхів: папки замінюються на XML файли в них."""
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+
+    xml_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            # Те саме, що glob "*.xml", але без імпорту glob та re при старті
+            names = [name for name in os.listdir(path) if not name.startswith('.') and os.path.normcase(name).endswith(".xml")]
+            xml_files.extend(sorted(os.path.join(path, name) for name in names))
+        else:
+            xml_files.append(os.fspath(path))
+    return xml_files
+
+def filter_xml_files(xml_files : list[str], file_filter : NameFilter | None) -> list[str]:
+    """Залишає файли, ім'я яких (з розширенням або без) проходить фільтр."""
+    if not file_filter:
+        return xml_files
+    return [xml_path for xml_path in xml_files
+            if file_filter.matches(os.path.basename(xml_path), os.path.splitext(os.path.basename(xml_path))[0])]
+
+def update_diagrams(inputs : str | Iterable[str], output_dir, options : UpdateOptions | None = None) -> list[UpdateResult]:
+    """
+    Оновлює діаграми для XML файлів без запуску окремого процесу.
+
+    Args:
+        inputs: XML файл, папка з XML файлами або список таких шляхів.
+        output_dir: Папка для збереження діаграм.
+        options: Параметри оновлення.
+
+    Returns:
+        list[UpdateResult]: Результат для кожного XML файлу у порядку обробки. Якщо оновлення скасовано,
+        останній оброблений результат має cancelled=True; файли після нього, а також пропущені
+        через обмеження часу, - в кінці, з skipped=True.
+    """
+    if options is None:
+        options = UpdateOptions()
+    echo = print if options.verbose else lambda *args: None
+
+    # Створюємо вихідну папку, якщо вона не існує
+    os.makedirs(output_dir, exist_ok=True)
+
+    xml_files = filter_xml_files(collect_xml_files(inputs), options.file_filter)
+    state = RunState.load(output_dir)
+    deadline = None
+    if options.time_budget > 0:
+        xml_files = state.prioritize(xml_files)
+        deadline = time.perf_counter() + options.time_budget
+
+    # Профілювання пам'яті вимірює лише поточний потік, тому конвеєр для нього не використовуємо
+    if options.profile_memory:
+        import tracemalloc
+    started_tracing = options.profile_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    emit_progress(options, "start", files=len(xml_files))
+    try:
+        if options.pipeline and not options.profile_memory:
+            results = _update_diagrams_pipelined(xml_files, output_dir, options, deadline)
+        else:
+            results = []
+            for index, xml_path in enumerate(xml_files):
+                if _budget_spent(results, deadline):
+                    break
+                results.append(update_file(xml_path, output_dir, _file_options(options, index, len(xml_files))))
+                if results[-1].cancelled:
+                    break
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+    cancelled = bool(results) and results[-1].cancelled
+    processed = len(results) - int(cancelled)
+    skipped = xml_files[len(results):]
+    if skipped and not cancelled:
+        echo(f"Обмеження часу вичерпано, пропущено {len(skipped)} файлів - їх буде оброблено першими наступного разу.")
+    results.extend(UpdateResult(input_path=xml_path, output_path=get_output_path(xml_path, output_dir), skipped=True)
+                   for xml_path in skipped)
+
+    # Запам'ятовуємо тривалість обробки та пропущені файли для наступного запуску;
+    # скасований файл, як і пропущені, обробляється першим наступного разу
+    for result in results:
+        # Для файлу без класів діаграма не записується
+        output_paths = ([result.output_path] if "drawio" in options.sinks and result.class_count else []) + result.exports
+        pending = result.skipped or result.cancelled
+        state.record(result.input_path, None if pending else sum(result.timings.values()), pending=pending,
+                     output_paths=output_paths if result.success else None, output_key=options.output_key())
+    try:
+        state.save()
+    except OSError as e:
+        logger.error(f"Не вдалося зберегти стан {state.path}: {e}")
+
+    emit_progress(options, "done", files=len(xml_files), processed=processed, skipped=len(skipped) + int(cancelled), cancelled=cancelled)
+    return results
+
+def _budget_spent(results : list[UpdateResult], deadline : float | None) -> bool:
+    """Чи вичерпано обмеження часу. Перший файл обробляється завжди."""
+    return deadline is not None and bool(results) and time.perf_counter() >= deadline
+
+def _file_options(options : UpdateOptions, index : int, count : int) -> UpdateOptions:
+    """Параметри для одного файлу: події прогресу доповнюються номером файлу та кількістю файлів."""
+    if options.progress is None:
+        return options
+    progress = options.progress
+    return replace(options, progress=lambda event: progress({**event, 'index': index, 'files': count}))
+
+def _update_diagrams_pipelined(xml_files : list[str], output_dir, options : UpdateOptions, deadline : float | None = None) -> list[UpdateResult]:
+    """
+    Оновлює діаграми конвеєром: поки обробляється поточний файл, наступний читається
+    у фоновому потоці, а готові діаграми записуються окремим потоком з обмеженою чергою.
+    """
+    echo = print if options.verbose else lambda *args: None
+
+    def on_written(result : UpdateResult, bytes_written : int, error : Exception | None):
+        if error is None:
+            result.bytes_written = bytes_written
+            echo(f"Діаграма успішно збережена: {result.output_path}")
+        else:
+            result.success = False
+            result.error = f"Не вдалося зберегти діаграму: {result.output_path} ({error})"
+            logger.error(result.error)
+            echo(result.error)
+
+    from diagram_io import DiagramWriter, InputPrefetcher
+
+    results = []
+    jobs = [(xml_path, get_output_path(xml_path, output_dir)) for xml_path in xml_files]
+    with InputPrefetcher(jobs) as prefetcher, DiagramWriter(options.write_queue_size, on_written) as writer:
+        for index, ((xml_path, _), future) in enumerate(prefetcher):
+            if _budget_spent(results, deadline):
+                break
+            try:
+                prefetched = future.result()
+            except OSError as e:
+                # Не вдалося прочитати заздалегідь - update_file спробує прочитати файл сам
+                logger.error(f"Помилка при попередньому читанні {xml_path}: {e}")
+                prefetched = None
+            results.append(update_file(xml_path, output_dir, _file_options(options, index, len(jobs)), prefetched, writer))
+            if results[-1].cancelled:
+                # Діаграми, які вже стоять у черзі, записуються повністю
+                break
+    return results
+
+def write_json(data, path):
+    """Зберігає дані у JSON файл, створюючи папку, якщо потрібно."""
+    import json
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+def write_report(results : list[UpdateResult], report_path):
+    """Зберігає метрики архітектури всіх оброблених файлів у JSON (ключ - ім'я вхідного файлу)."""
+    write_json({os.path.basename(result.input_path): result.report for result in results if result.report is not None}, report_path)
+
+def write_memory_profile(results : list[UpdateResult], profile_path):
+    """Зберігає пам'ять кожної фази всіх оброблених файлів у JSON (ключ - ім'я вхідного файлу)."""
+    write_json({os.path.basename(result.input_path): {
+        'class_count': result.class_count,
+        'phases': result.memory,
+    } for result in results if result.memory is not None}, profile_path)
+
+def help_formatter(prog) -> argparse.HelpFormatter:
+    """
+    Форматер довідки з шириною термінала без shutil: argparse створює форматер для кожного
+    add_argument, а стандартний імпортує shutil, що помітно на запуску, коли нічого не змінилося.
+    """
+    try:
+        width = int(os.environ.get('COLUMNS') or os.get_terminal_size(sys.__stdout__.fileno()).columns)
+    except (AttributeError, OSError, ValueError):
+        width = 80
+    return argparse.HelpFormatter(prog, width=width - 2)
+
 def parse_arguments():
     """Парсинг аргументів командного рядка."""
-    parser = argparse.ArgumentParser(description='Створення UML діаграм з XML файлів')
+    parser = argparse.ArgumentParser(description='Створення UML діаграм з XML файлів', formatter_class=help_formatter)
     parser.add_argument('--input', '-i', required=True, help='Папка з XML файлами')
     parser.add_argument('--output', '-o', required=True, help='Папка для збереження UML діаграм')
     parser.add_argument('--cleanup-classes', action='store_true', help='Автоматично видаляє класи, які більше не існують у коді')
     parser.add_argument('--cleanup-arrows', action='store_true', help='Автоматично видаляє стрілки, які більше не існують у коді')
+    parser.add_argument('--pipeline', action='store_true', help='Читає наступний файл та записує діаграми у фонових потоках')
+    parser.add_argument('--max-classes-per-page', type=int, default=0, help='Розбиває великі діаграми на сторінки з не більше ніж N класів')
+    parser.add_argument('--shard-by', choices=['component', 'namespace'], default='component',
+                        help='Групування класів при розбитті на сторінки: за зв\'язками або за простором імен')
+    parser.add_argument('--tooltip-max-chars', type=int, default=0,
+                        help='Максимум символів підказки одного поля чи методу; спершу відкидаються розділи, крім Purpose та Params')
+    parser.add_argument('--tooltip-max-item-chars', type=int, default=0, help='Максимум символів підказки всього блоку полів або методів')
+    parser.add_argument('--compact-tooltips', action='store_true', help='Коротші відступи у підказках (&emsp; замість &nbsp;)')
+    parser.add_argument('--tooltips-changed-only', action='store_true', help='Будувати підказки лише для нових та змінених полів і методів; незмінні зберігають підказку з діаграми')
+    parser.add_argument('--summarize-over', type=int, default=0, metavar='N',
+                        help='Скорочує класи, у яких більше N полів і методів: у мітці лише частина членів, повний список - у підказці')
+    parser.add_argument('--summary-top', type=int, default=10, metavar='N', help='Скільки полів і скільки методів показувати у скороченому класі')
+    parser.add_argument('--summary-public', action='store_true', help='Показувати у скороченому класі лише публічні члени')
+    parser.add_argument('--render-jobs', type=int, default=1, metavar='N',
+                        help='Процеси для обчислення міток і розмірів класів великої сторінки (0 - усі ядра)')
+    parser.add_argument('--profile-memory', metavar='PATH',
+                        help='Зберігає у JSON пік пам\'яті та основні місця виділення для кожної фази (tracemalloc, без конвеєра)')
+    parser.add_argument('--time-budget', type=float, default=0, metavar='SECONDS',
+                        help='Обмеження часу: спершу найновіші файли, зупинка між файлами, пропущені - першими наступного разу')
+    parser.add_argument('--progress', choices=['jsonl'], help='Друкує прогрес рядками JSON (по одному на фазу та файл)')
+    parser.add_argument('--cancel-file', metavar='PATH', help='Зупиняє оновлення між фазами, коли з\'являється цей файл')
+    parser.add_argument('--include', action='append', default=[], metavar='PATTERN',
+                        help='Лише класи, ім\'я яких (коротке або з простором імен) збігається з шаблоном: glob або "re:<регулярний вираз>"; можна повторювати')
+    parser.add_argument('--exclude', action='append', default=[], metavar='PATTERN', help='Пропускає класи, ім\'я яких збігається з шаблоном')
+    parser.add_argument('--include-files', action='append', default=[], metavar='PATTERN', help='Лише XML файли, ім\'я яких збігається з шаблоном')
+    parser.add_argument('--exclude-files', action='append', default=[], metavar='PATTERN', help='Пропускає XML файли, ім\'я яких збігається з шаблоном')
+    parser.add_argument('--sink', action='append', choices=['drawio', 'json', 'plantuml'], metavar='{drawio,json,plantuml}',
+                        help='Вивід з однієї розібраної моделі: drawio (за замовчуванням), json (граф класів), plantuml; можна повторювати')
+    parser.add_argument('--force', action='store_true', help='Оновлює діаграми, навіть якщо XML, діаграми та параметри не змінилися')
+    parser.add_argument('--report', metavar='PATH', help='Зберігає у JSON метрики архітектури: fan-in/fan-out, глибину наслідування, цикли асоціацій (потрібен NumPy)')
     return parser.parse_args()
 
 def main():
+    setup_logging()
+
     # Парсимо аргументи командного рядка
     args = parse_arguments()
     
@@ -209,42 +832,79 @@ def main():
         print(f"Помилка: Вхідна папка '{args.input}' не існує.")
         return
     
-    # Створюємо вихідну папку, якщо вона не існує
-    os.makedirs(args.output, exist_ok=True)
-    
+    from name_filter import NameFilter
+    try:
+        class_filter = NameFilter(args.include, args.exclude)
+        file_filter = NameFilter(args.include_files, args.exclude_files)
+    except ValueError as e:
+        print(f"Помилка: {e}")
+        return
+
     # Знаходимо всі XML файли у вхідній папці
-    xml_files = glob.glob(os.path.join(args.input, "*.xml"))
+    xml_files = filter_xml_files(collect_xml_files(args.input), file_filter)
     
     if not xml_files:
         print(f"У папці '{args.input}' не знайдено XML файлів.")
         return
     
+    if args.report:
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            print("Помилка: для --report потрібен NumPy (pip install numpy).")
+            return
+
     print(f"Знайдено {len(xml_files)} XML файлів.")
     
+    # SIGTERM та файл скасування зупиняють оновлення між фазами, не залишаючи частково записаних діаграм
+    cancel_token = CancelToken(args.cancel_file)
+
+    options = UpdateOptions(
+        cleanup_classes=args.cleanup_classes,
+        cleanup_arrows=args.cleanup_arrows,
+        pipeline=args.pipeline,
+        max_classes_per_page=args.max_classes_per_page,
+        shard_by=args.shard_by,
+        tooltip_max_chars=args.tooltip_max_chars,
+        tooltip_max_item_chars=args.tooltip_max_item_chars,
+        compact_tooltips=args.compact_tooltips,
+        tooltips_changed_only=args.tooltips_changed_only,
+        summarize_over=args.summarize_over,
+        summary_top=args.summary_top,
+        summary_public_only=args.summary_public,
+        render_jobs=args.render_jobs,
+        profile_memory=bool(args.profile_memory),
+        report=bool(args.report),
+        time_budget=args.time_budget,
+        class_filter=class_filter or None,
+        file_filter=file_filter or None,
+        sinks=tuple(dict.fromkeys(args.sink or ["drawio"])),
+        progress=jsonl_progress_writer() if args.progress == 'jsonl' else None,
+        cancel_token=cancel_token,
+        verbose=True
+    )
+
+    # Найчастіший випадок у git-хуку: нічого не змінилося, тож модулі діаграм навіть не імпортуємо
+    if not (args.force or args.report or args.profile_memory) and \
+            RunState.load(args.output).is_up_to_date(xml_files, options.output_key()):
+        print("Діаграми актуальні, змін немає.")
+        return
+
     # Обробляємо кожен XML файл
-    for xml_path in xml_files:
-        # Отримуємо ім'я файлу без шляху та розширення
-        file_name = os.path.basename(xml_path)
-        file_name_without_ext = os.path.splitext(file_name)[0]
-        
-        # Шлях до вихідного файлу drawio
-        output_path = os.path.join(args.output, f"{file_name_without_ext}.drawio")
-        # Повний шлях до вихідного файлу drawio
-        output_path = os.path.abspath(output_path)
-        
-        print(f"\nОбробка файлу: {file_name}")
-        
-        # Парсимо XML і отримуємо список об'єктів ClassData
-        class_data_list = parse_xml_to_class_data(xml_path)
-        
-        if not class_data_list:
-            print(f"Не вдалося отримати дані про класи з файлу {file_name}.")
-            continue
-        
-        print(f"Знайдено {len(class_data_list)} класів у файлі {file_name}.")
-        
-        # Створюємо UML діаграму
-        create_uml_diagram(class_data_list, output_path, args.cleanup_classes, args.cleanup_arrows)
+    cancel_token.install_signal_handlers()
+    results = update_diagrams(xml_files, args.output, options)
+
+    if cancel_token.is_cancelled():
+        print("Оновлення скасовано.")
+        sys.exit(2)
+
+    if args.report:
+        write_report(results, args.report)
+        print(f"Звіт збережено: {args.report}")
+    if args.profile_memory:
+        write_memory_profile(results, args.profile_memory)
+        print(f"Профіль пам'яті збережено: {args.profile_memory}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Порівняльний прогін двох версій генератора на еталонному корпусі.
+
+Базова версія береться з git (git archive), кандидат - з робочої копії або іншого git ref.
+Обидві версії запускаються окремими процесами на однакових вхідних даних: синтетичному корпусі
+(створення, перехід до двосторонньої асоціації та назад, видалення класів, міграція старого
+формату, правки користувача) та, за потреби, на папках з парами XML + .drawio.
+Кожен крок кожна версія починає з однієї й тієї самої діаграми, тому різниця у виводі
+належить саме цьому кроку.
+
+Вихідні діаграми порівнюються побайтово та семантично (порядок атрибутів, пробіли,
+екранування та порядок елементів сторінки не враховуються). Код завершення 1, якщо є
+семантичні відмінності (з --strict - будь-які відмінності).
+
+Приклад:
+    python golden_harness.py --baseline HEAD
+    python golden_harness.py --baseline v1.2 --candidate HEAD --corpus ../Samples --strict
+"""
+
+import argparse
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from typing import Callable, NamedTuple
+
+from run_state import LEGACY_STATE_FILE_NAME, STATE_DIR_ENV, get_state_path
+
+
+# Параметри, з якими запускаються обидві версії
+DEFAULT_ARGS = ["--cleanup-classes", "--cleanup-arrows"]
+
+
+class Step(NamedTuple):
+    """Крок сценарію: вхідні XML (ім'я -> вміст) і правка діаграми перед кроком."""
+    xml_files : dict[str, str]
+    mutate : Callable[[str], None] | None = None
+
+
+class Case(NamedTuple):
+    name : str
+    steps : list[Step]
+    # Діаграми, з яких починається перший крок (ім'я -> шлях)
+    diagrams : dict[str, str] = {}
+
+
+# --- Версії генератора ---
+
+def export_ref(ref : str, dest : str) -> str:
+    """Розпаковує папку Python з git ref у dest і повертає шлях до неї."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    top = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=script_dir, check=True,
+                         capture_output=True, text=True).stdout.strip()
+    prefix = os.path.relpath(script_dir, top).replace(os.sep, "/")
+    archive = subprocess.run(["git", "archive", "--format=tar", ref, prefix], cwd=top, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(dest, filter='data')
+        else:
+            tar.extractall(dest)
+    return os.path.join(dest, *prefix.split("/"))
+
+
+def copy_worktree(dest : str) -> str:
+    """Копіює папку скрипта (без кешів та логів), щоб запуски не писали у робочу копію."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    target = os.path.join(dest, "Python")
+    shutil.copytree(script_dir, target, ignore=shutil.ignore_patterns("__pycache__", "*.log", "*.meta"))
+    return target
+
+
+def run_generator(python_dir : str, input_dir : str, output_dir : str, args : list[str]) -> tuple[float, str]:
+    """Запускає generate_uml.py версії з python_dir; повертає тривалість і вивід. Файл стану видаляється, щоб крок не пропускався."""
+    # Старі версії зберігають стан у вихідній папці
+    for state_path in (get_state_path(output_dir), os.path.join(output_dir, LEGACY_STATE_FILE_NAME)):
+        if os.path.exists(state_path):
+            os.remove(state_path)
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, os.path.join(python_dir, "generate_uml.py"), "-i", input_dir, "-o", output_dir] + args,
+                             capture_output=True, text=True, encoding='utf-8', errors='replace')
+    seconds = time.perf_counter() - start
+    if process.returncode != 0:
+        raise RuntimeError(f"{python_dir}: код завершення {process.returncode}\n{process.stderr}")
+    return seconds, process.stdout
+
+
+# --- Синтетичний корпус ---
+
+def class_xml(classes : list[dict]) -> str:
+    """XML з описом класів: name, base, tooltip, fields [(рядок, підказка)], methods [(рядок, підказка)]."""
+    root = ET.Element('Namespace', {'n': 'Golden'})
+    for spec in classes:
+        attributes = {'n': spec['name'], 'c': spec.get('tooltip', "")}
+        if spec.get('base'):
+            attributes['b'] = spec['base']
+        class_elem = ET.SubElement(root, 'Class', attributes)
+        for tag, items in (('Fields', spec.get('fields', [])), ('Methods', spec.get('methods', []))):
+            if items:
+                items_elem = ET.SubElement(class_elem, tag)
+                for value, tooltip in items:
+                    item_attributes = {'v': value}
+                    if tooltip is not None:
+                        item_attributes['c'] = tooltip
+                    ET.SubElement(items_elem, tag[:-1], item_attributes)
+    return ET.tostring(root, encoding='unicode')
+
+
+def base_classes() -> list[dict]:
+    """Класи з наслідуванням, односторонніми та двосторонніми асоціаціями, дженеріками й підказками зі спецсимволами."""
+    return [
+        {'name': "Entity", 'tooltip': "Purpose: base of 'all' \"entities\" & <things>; Usage: inherit it",
+         'fields': [("- id: int", "Purpose: unique id")], 'methods': [("+ Tick(dt: float): void", "Purpose: update; Params: dt - delta")]},
+        {'name': "Player", 'base': "Entity", 'tooltip': "Purpose: the player",
+         'fields': [("- inventory: Inventory", "Purpose: items"), ("- target: Enemy", None), ("- allies: List<Player>", None)],
+         'methods': [("+ Attack(enemy: Enemy): bool", "Purpose: hit; Returns: true on hit")]},
+        {'name': "Enemy", 'base': "Entity",
+         'fields': [("- target: Player", "Purpose: who to chase"), ("- loot: List<Item>", None)]},
+        {'name': "Inventory",
+         'fields': [("- items: Dictionary<string, Item>", "Purpose: by id")]},
+        {'name': "Item", 'tooltip': "Purpose: anything that can be carried",
+         'fields': [("- container: Inventory", None)], 'methods': [("+ Use(): void", None)]},
+        {'name': "Weapon", 'base': "Item", 'fields': [("- owner: Player", None)]},
+        {'name': "Empty"},
+    ]
+
+
+def with_changes(classes : list[dict], remove : tuple[str, ...] = (), **changes : dict) -> list[dict]:
+    """Копія класів без remove та зі зміненими полями окремих класів (ім'я -> зміни)."""
+    result = []
+    for spec in classes:
+        if spec['name'] in remove:
+            continue
+        result.append({**spec, **changes.get(spec['name'], {})})
+    return result
+
+
+def to_legacy_format(diagram_path : str):
+    """Перетворює діаграму на старий формат: класи - звичайні mxCell з value, без позначки формату."""
+    tree = ET.parse(diagram_path)
+    for model in tree.getroot().iter('mxGraphModel'):
+        model.attrib.pop("drawioUpdaterFormat", None)
+        root = model.find('root')
+        for index, user_object in enumerate(list(root)):
+            cell = user_object.find('mxCell')
+            if user_object.tag != 'UserObject' or cell is None:
+                continue
+            legacy = ET.Element('mxCell', {'id': user_object.get('id'), 'value': user_object.get('label', ""), **cell.attrib})
+            legacy.extend(list(cell))
+            legacy.tail = user_object.tail
+            root[index] = legacy
+    tree.write(diagram_path, encoding='utf-8')
+
+
+def add_user_edits(diagram_path : str):
+    """Додає правки користувача: фігури, текст з лапками, довільні стрілки та перефарбовану асоціацію."""
+    tree = ET.parse(diagram_path)
+    root = tree.getroot().find('diagram/mxGraphModel/root')
+    shapes = [
+        ('mxCell', {'id': "user-note", 'value': "Note with 'quotes' & <b>markup</b>", 'style': "text;html=1;", 'vertex': "1", 'parent': "1"}),
+        ('mxCell', {'id': "user-shape", 'value': "", 'style': "ellipse;whiteSpace=wrap;html=1;fillColor=#ff0000;", 'vertex': "1", 'parent': "1"}),
+        ('mxCell', {'id': "user-edge", 'value': "", 'style': "endArrow=classic;html=1;", 'edge': "1", 'parent': "1",
+                    'source': "user-note", 'target': "user-shape"}),
+    ]
+    for tag, attributes in shapes:
+        cell = ET.SubElement(root, tag, attributes)
+        ET.SubElement(cell, 'mxGeometry', {'x': "10", 'y': "900", 'width': "80", 'height': "40", 'as': "geometry"})
+    for cell in root.iter('mxCell'):
+        if cell.get('style') == "curved=1;endArrow=classic;html=1;rounded=0;":
+            cell.set('style', cell.get('style') + "strokeColor=#FF0000;")
+            break
+    tree.write(diagram_path, encoding='utf-8')
+
+
+def build_corpus(large_classes : int) -> list[Case]:
+    """Синтетичні сценарії, які покривають основні шляхи оновлення діаграми."""
+    base = base_classes()
+    # Inventory -> Player робить асоціацію Player -> Inventory двосторонньою; Weapon втрачає поле
+    upgrade = with_changes(base, Inventory={'fields': base[3]['fields'] + [("- owner: Player", None)]}, Weapon={'fields': []})
+    # Enemy та Empty видаляються, Item більше не посилається на Inventory (двостороння стає односторонньою),
+    # Weapon тепер наслідує Entity
+    cleanup = with_changes(upgrade, remove=("Enemy", "Empty"), Item={'fields': []}, Weapon={'base': "Entity"},
+                           Player={'fields': [("- inventory: Inventory", "Purpose: items")]})
+    # Зворотна асоціація без прямої: стрілка розвертається
+    flip = with_changes(upgrade, Player={'fields': []})
+
+    cases = [
+        Case("lifecycle", [Step({"Lifecycle.xml": class_xml(base)}),
+                           Step({"Lifecycle.xml": class_xml(upgrade)}),
+                           Step({"Lifecycle.xml": class_xml(cleanup)})]),
+        Case("flip", [Step({"Flip.xml": class_xml(upgrade)}), Step({"Flip.xml": class_xml(flip)})]),
+        Case("migration", [Step({"Migration.xml": class_xml(base)}),
+                           Step({"Migration.xml": class_xml(upgrade)}, to_legacy_format)]),
+        Case("user-edits", [Step({"UserEdits.xml": class_xml(base)}),
+                            Step({"UserEdits.xml": class_xml(cleanup)}, add_user_edits)]),
+    ]
+    if large_classes > 0:
+        from benchmark import generate_input
+        with tempfile.TemporaryDirectory() as work_dir:
+            steps = []
+            for seed in (1, 2):
+                path = os.path.join(work_dir, f"{seed}.xml")
+                generate_input(path, large_classes, 6, 6, seed)
+                with open(path, 'r', encoding='utf-8') as f:
+                    steps.append(Step({"Large.xml": f.read()}))
+        cases.append(Case("large", steps))
+    return cases
+
+
+def load_corpus_dir(path : str) -> list[Case]:
+    """Папка з XML файлами та, за бажанням, існуючими діаграмами з тими самими іменами (один крок)."""
+    cases = []
+    for directory in [path] + sorted(os.path.join(path, name) for name in os.listdir(path)):
+        if not os.path.isdir(directory):
+            continue
+        xml_files, diagrams = {}, {}
+        for name in sorted(os.listdir(directory)):
+            full_path = os.path.join(directory, name)
+            if name.endswith(".xml"):
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    xml_files[name] = f.read()
+            elif name.endswith(".drawio"):
+                diagrams[name] = full_path
+        if xml_files:
+            cases.append(Case(os.path.relpath(directory, os.path.dirname(path)), [Step(xml_files)], diagrams))
+    return cases
+
+
+# --- Порівняння ---
+
+def canonical(elem : ET.Element, unordered : bool = False) -> tuple:
+    """Канонічне подання елемента: атрибути без порядку, текст без крайових пробілів; діти root - без порядку."""
+    children = [canonical(child, child.tag == 'root') for child in elem]
+    if unordered:
+        children.sort(key=repr)
+    return (elem.tag, tuple(sorted(elem.attrib.items())), (elem.text or "").strip(), tuple(children))
+
+
+def semantic_diff(path_a : str, path_b : str, limit : int = 10) -> list[str]:
+    """Семантичні відмінності двох діаграм: для кожної сторінки - відсутні, зайві та змінені елементи за id."""
+    try:
+        root_a, root_b = ET.parse(path_a).getroot(), ET.parse(path_b).getroot()
+    except ET.ParseError as e:
+        return [f"не вдалося розібрати XML: {e}"]
+    if canonical(root_a) == canonical(root_b):
+        return []
+
+    differences = []
+    pages_a = {page.get('name'): page for page in root_a.iter('diagram')}
+    pages_b = {page.get('name'): page for page in root_b.iter('diagram')}
+    if list(pages_a) != list(pages_b):
+        differences.append(f"сторінки: {list(pages_a)} != {list(pages_b)}")
+    for name in pages_a.keys() & pages_b.keys():
+        model_a, model_b = pages_a[name].find('mxGraphModel'), pages_b[name].find('mxGraphModel')
+        if model_a is None or model_b is None:
+            continue
+        if model_a.attrib != model_b.attrib:
+            differences.append(f"[{name}] mxGraphModel: {model_a.attrib} != {model_b.attrib}")
+        cells_a = {cell.get('id'): cell for cell in model_a.find('root')}
+        cells_b = {cell.get('id'): cell for cell in model_b.find('root')}
+        for cell_id in cells_a.keys() - cells_b.keys():
+            differences.append(f"[{name}] лише у базовій версії: {cells_a[cell_id].tag} {cell_id} {cells_a[cell_id].get('label') or ''}")
+        for cell_id in cells_b.keys() - cells_a.keys():
+            differences.append(f"[{name}] лише у кандидата: {cells_b[cell_id].tag} {cell_id} {cells_b[cell_id].get('label') or ''}")
+        for cell_id in cells_a.keys() & cells_b.keys():
+            for elem_a, elem_b in zip(cells_a[cell_id].iter(), cells_b[cell_id].iter()):
+                if elem_a.attrib != elem_b.attrib or elem_a.tag != elem_b.tag:
+                    changed = {key for key in elem_a.attrib.keys() | elem_b.attrib.keys() if elem_a.get(key) != elem_b.get(key)}
+                    differences.append(f"[{name}] {cell_id} <{elem_a.tag}>: " +
+                                       ", ".join(f"{key}: {elem_a.get(key)!r} != {elem_b.get(key)!r}" for key in sorted(changed)))
+                    break
+            else:
+                if canonical(cells_a[cell_id]) != canonical(cells_b[cell_id]):
+                    differences.append(f"[{name}] {cell_id}: відрізняються дочірні елементи")
+    return sorted(differences)[:limit] or ["відрізняється структура документа"]
+
+
+def compare_outputs(dir_a : str, dir_b : str) -> tuple[list[str], dict[str, list[str]]]:
+    """Повертає файли, що відрізняються побайтово, та семантичні відмінності для кожного файлу."""
+    names = sorted(set(os.listdir(dir_a)) | set(os.listdir(dir_b)))
+    byte_diffs, semantic = [], {}
+    for name in names:
+        if name == LEGACY_STATE_FILE_NAME:
+            continue
+        path_a, path_b = os.path.join(dir_a, name), os.path.join(dir_b, name)
+        if not os.path.exists(path_a) or not os.path.exists(path_b):
+            byte_diffs.append(name)
+            semantic[name] = ["файл є лише у " + ("кандидата" if os.path.exists(path_b) else "базовій версії")]
+            continue
+        with open(path_a, 'rb') as fa, open(path_b, 'rb') as fb:
+            if fa.read() == fb.read():
+                continue
+        byte_diffs.append(name)
+        differences = semantic_diff(path_a, path_b)
+        if differences:
+            semantic[name] = differences
+    return byte_diffs, semantic
+
+
+# --- Прогін ---
+
+def run_case(case : Case, baseline_dir : str, candidate_dir : str, work_dir : str, args : list[str]) -> dict:
+    """Проганяє всі кроки сценарію обома версіями. Наступний крок починається з результату базової версії."""
+    shared = os.path.join(work_dir, case.name, "shared")
+    os.makedirs(shared)
+    for name, path in case.diagrams.items():
+        shutil.copy2(path, os.path.join(shared, name))
+
+    report = {'case': case.name, 'steps': [], 'seconds': {'baseline': 0.0, 'candidate': 0.0}}
+    for index, step in enumerate(case.steps):
+        step_dir = os.path.join(work_dir, case.name, f"step{index}")
+        input_dir = os.path.join(step_dir, "input")
+        os.makedirs(input_dir)
+        for name, content in step.xml_files.items():
+            with open(os.path.join(input_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+        if step.mutate is not None:
+            for name in os.listdir(shared):
+                if name.endswith(".drawio"):
+                    step.mutate(os.path.join(shared, name))
+
+        outputs = {}
+        for label, python_dir in (('baseline', baseline_dir), ('candidate', candidate_dir)):
+            outputs[label] = os.path.join(step_dir, label)
+            shutil.copytree(shared, outputs[label])
+            seconds, _ = run_generator(python_dir, input_dir, outputs[label], args)
+            report['seconds'][label] += seconds
+
+        byte_diffs, semantic = compare_outputs(outputs['baseline'], outputs['candidate'])
+        report['steps'].append({'byte_diffs': byte_diffs, 'semantic': semantic})
+
+        shutil.rmtree(shared)
+        shutil.copytree(outputs['baseline'], shared)
+    return report
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='Порівняння виводу двох версій генератора на еталонному корпусі')
+    parser.add_argument('--baseline', default='HEAD', help='Git ref базової версії')
+    parser.add_argument('--candidate', help='Git ref кандидата (за замовчуванням - робоча копія)')
+    parser.add_argument('--corpus', action='append', default=[], metavar='DIR',
+                        help='Папка з XML та існуючими .drawio (або з підпапками таких пар); можна повторювати')
+    parser.add_argument('--large-classes', type=int, default=150, help='Класів у великому синтетичному сценарії (0 - без нього)')
+    parser.add_argument('--args', default=" ".join(DEFAULT_ARGS), help='Параметри generate_uml.py для обох версій')
+    parser.add_argument('--strict', action='store_true', help='Вважати помилкою і побайтові відмінності')
+    parser.add_argument('--keep', metavar='DIR', help='Зберігає входи та виходи всіх кроків у папці')
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    generator_args = args.args.split()
+
+    cases = build_corpus(args.large_classes)
+    for corpus_dir in args.corpus:
+        cases.extend(load_corpus_dir(corpus_dir))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # Стан запусків (і обох версій генератора) - у тимчасовій папці, а не в кеші користувача
+        os.environ[STATE_DIR_ENV] = os.path.join(temp_dir, "state")
+        work_dir = args.keep or os.path.join(temp_dir, "work")
+        baseline_dir = export_ref(args.baseline, os.path.join(temp_dir, "baseline"))
+        candidate_dir = export_ref(args.candidate, os.path.join(temp_dir, "candidate")) if args.candidate \
+            else copy_worktree(os.path.join(temp_dir, "candidate"))
+        reports = [run_case(case, baseline_dir, candidate_dir, work_dir, generator_args) for case in cases]
+
+    failed = False
+    for report in reports:
+        byte_steps = sum(1 for step in report['steps'] if step['byte_diffs'])
+        semantic_steps = sum(1 for step in report['steps'] if step['semantic'])
+        failed = failed or semantic_steps > 0 or (args.strict and byte_steps > 0)
+        status = "OK" if not byte_steps else "ЛИШЕ ФОРМАТ" if not semantic_steps else "ВІДРІЗНЯЄТЬСЯ"
+        print(f"{report['case']}: {status} ({len(report['steps'])} кроків; "
+              f"{report['seconds']['baseline']:.2f} с -> {report['seconds']['candidate']:.2f} с)")
+        for index, step in enumerate(report['steps']):
+            for name in step['byte_diffs']:
+                print(f"    крок {index}: {name} відрізняється побайтово")
+                for difference in step['semantic'].get(name, []):
+                    print(f"        {difference}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
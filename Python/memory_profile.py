@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+import tracemalloc
+from contextlib import contextmanager
+
+
+class PhaseMemoryProfiler:
+    """
+    Вимірює пам'ять кожної фази оновлення діаграми через tracemalloc.
+
+    Для фази зберігається пік (скільки пам'яті додалося понад стан на початку фази
+    та загальний пік), скільки пам'яті фаза залишила після себе і місця в коді,
+    які виділили найбільше залишеної пам'яті.
+    """
+
+    def __init__(self, phases : dict[str, dict] | None = None, top : int = 10):
+        # Результати вимірювань: ім'я фази -> метрики
+        self.phases : dict[str, dict] = phases if phases is not None else {}
+        self.top = top
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        # Пам'ять самого tracemalloc не цікавить
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),))
+
+    @contextmanager
+    def phase(self, name : str):
+        """Профілює блок коду як фазу name. Якщо tracemalloc не запущено, нічого не вимірює."""
+        if not tracemalloc.is_tracing():
+            yield
+            return
+
+        before = self._snapshot()
+        current_before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        try:
+            yield
+        finally:
+            current_after, peak = tracemalloc.get_traced_memory()
+            stats = self._snapshot().compare_to(before, 'lineno')
+            del before
+
+            top = []
+            for stat in sorted(stats, key=lambda s: s.size_diff, reverse=True)[:self.top]:
+                if stat.size_diff <= 0:
+                    break
+                frame = stat.traceback[0]
+                top.append({
+                    'site': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                    'size_bytes': stat.size_diff,
+                    'count': stat.count_diff,
+                })
+
+            self.phases[name] = {
+                'peak_bytes': peak - current_before,
+                'peak_total_bytes': peak,
+                'retained_bytes': current_after - current_before,
+                'top': top,
+            }
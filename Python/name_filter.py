@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import fnmatch
+import re
+from collections.abc import Iterable
+
+
+# Префікс шаблону, який задає регулярний вираз замість glob
+REGEX_PREFIX = "re:"
+
+
+class NameFilter:
+    """
+    Фільтр імен класів або файлів за шаблонами include/exclude.
+
+    Шаблон - glob ("Game.*", "*Editor*") або регулярний вираз з префіксом "re:" ("re:Game\\.(AI|UI)\\..*").
+    Шаблон має збігтися з усім ім'ям. Ім'я проходить фільтр, якщо збігається хоча б з одним
+    include (або include не задано) і не збігається з жодним exclude.
+    """
+
+    def __init__(self, include : Iterable[str] = (), exclude : Iterable[str] = ()):
+        self.include_patterns = list(include)
+        self.exclude_patterns = list(exclude)
+        self._include = [NameFilter.compile(pattern) for pattern in self.include_patterns]
+        self._exclude = [NameFilter.compile(pattern) for pattern in self.exclude_patterns]
+
+    @staticmethod
+    def compile(pattern : str) -> re.Pattern:
+        """Компілює шаблон; невірний регулярний вираз дає ValueError."""
+        if not pattern.startswith(REGEX_PREFIX):
+            return re.compile(fnmatch.translate(pattern))
+        try:
+            return re.compile(pattern[len(REGEX_PREFIX):])
+        except re.error as e:
+            raise ValueError(f"Невірний регулярний вираз '{pattern}': {e}") from None
+
+    def __bool__(self) -> bool:
+        return bool(self._include or self._exclude)
+
+    def key(self) -> str:
+        """Рядок, який змінюється разом із шаблонами (для кешу моделей та стану запусків)."""
+        return "|".join([f"+{pattern}" for pattern in self.include_patterns] + [f"-{pattern}" for pattern in self.exclude_patterns])
+
+    def matches(self, *names : str) -> bool:
+        """Чи проходить фільтр; names - варіанти одного імені (наприклад, коротке та з простором імен)."""
+        if self._include and not any(pattern.fullmatch(name) for pattern in self._include for name in names):
+            return False
+        return not any(pattern.fullmatch(name) for pattern in self._exclude for name in names)
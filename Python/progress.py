@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+
+# typing.TYPE_CHECKING без імпорту typing (анотації не обчислюються)
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import TextIO
+
+
+class UpdateCancelled(Exception):
+    """Оновлення скасовано через CancelToken."""
+
+
+class CancelToken:
+    """
+    Прапорець скасування оновлення.
+
+    Встановлюється викликом cancel() (наприклад, з обробника SIGTERM) або появою файлу cancel_file.
+    Оновлення перевіряє його між фазами та файлами, тому поточний файл або дописується повністю,
+    або не записується зовсім.
+    """
+
+    def __init__(self, cancel_file : str | None = None):
+        self.cancel_file = cancel_file
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def is_cancelled(self) -> bool:
+        if not self._cancelled and self.cancel_file is not None and os.path.exists(self.cancel_file):
+            self._cancelled = True
+        return self._cancelled
+
+    def raise_if_cancelled(self):
+        if self.is_cancelled():
+            raise UpdateCancelled()
+
+    def install_signal_handlers(self):
+        """Скасовує оновлення по SIGTERM замість негайного завершення процесу."""
+        import signal
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.cancel())
+
+
+def jsonl_progress_writer(stream : TextIO | None = None) -> Callable[[dict], None]:
+    """Повертає обробник подій прогресу, який пише кожну подію окремим рядком JSON з часом від старту."""
+    start = time.perf_counter()
+
+    def write(event : dict):
+        event = {**event, 'elapsed': round(time.perf_counter() - start, 3)}
+        out = stream if stream is not None else sys.stdout
+        out.write(json.dumps(event, ensure_ascii=False) + "\n")
+        out.flush()
+
+    return write
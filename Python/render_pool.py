@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, NamedTuple
+
+from class_data import ClassData
+
+
+# Менше класів рендеримо в основному процесі: запуск процесів коштує дорожче за саму роботу
+MIN_PARALLEL_CLASSES = 500
+# Скільки частин на один процес (менші частини рівномірніше розподіляються між процесами)
+CHUNKS_PER_JOB = 4
+
+
+class RenderSettings(NamedTuple):
+    """Параметри рендерингу класу (частина UpdateOptions, яку можна передати в інший процес)."""
+    tooltip_max_chars: int = 0
+    tooltip_max_item_chars: int = 0
+    compact_tooltips: bool = False
+    tooltips_changed_only: bool = False
+    summarize_over: int = 0
+    summary_top: int = 10
+    summary_public_only: bool = False
+
+    def from_options(options) -> "RenderSettings":
+        return RenderSettings(*(getattr(options, name) for name in RenderSettings._fields))
+
+    def rebuild_tooltips(self) -> bool:
+        return bool(self.tooltip_max_chars or self.tooltip_max_item_chars or self.compact_tooltips or self.tooltips_changed_only)
+
+
+class RenderedClass(NamedTuple):
+    """Результат рендерингу класу: мітки, підказки та розміри блоків."""
+    class_tooltip: str
+    fields: str | None
+    fields_tooltip: str
+    methods: str | None
+    methods_tooltip: str
+    custom_tooltips: bool
+    summarized: bool
+    sizes: tuple[tuple[int, int], tuple[int, int], int]
+
+    def apply(self, class_data : ClassData):
+        """Записує результат у клас основного процесу."""
+        (class_data.class_tooltip, class_data.fields, class_data.fields_tooltip, class_data.methods,
+         class_data.methods_tooltip, class_data.custom_tooltips, class_data.summarized, class_data.rendered_sizes) = self
+
+
+def render_class(class_data : ClassData, settings : RenderSettings, known_tooltips : dict[str, str] | None = None) -> RenderedClass:
+    """
+    Обчислює підказки, скорочені мітки та розміри класу. Не звертається до діаграми:
+    known_tooltips (для tooltips_changed_only) потрібно отримати з діаграми заздалегідь.
+    """
+    if settings.rebuild_tooltips():
+        class_data.build_tooltips(settings.tooltip_max_chars, settings.tooltip_max_item_chars,
+                                  settings.compact_tooltips, known_tooltips)
+    if settings.summarize_over > 0:
+        class_data.summarize(settings.summarize_over, settings.summary_top, settings.summary_public_only,
+                             settings.tooltip_max_item_chars)
+    class_data.rendered_sizes = class_data.get_sizes()
+    return RenderedClass(class_data.class_tooltip, class_data.fields, class_data.fields_tooltip, class_data.methods,
+                         class_data.methods_tooltip, class_data.custom_tooltips, class_data.summarized, class_data.rendered_sizes)
+
+
+def _render_chunk(states : list[tuple], known_tooltips : list[dict[str, str] | None], settings : RenderSettings) -> list[RenderedClass]:
+    return [render_class(ClassData.from_render_state(state), settings, tooltips) for state, tooltips in zip(states, known_tooltips)]
+
+
+def render_classes(class_data_list : list[ClassData], settings : RenderSettings, jobs : int = 1,
+                   known_tooltips : list[dict[str, str] | None] | None = None, check_cancelled : Callable[[], None] | None = None):
+    """
+    Фаза рендерингу: обчислює мітки, підказки та розміри класів і записує їх у класи.
+
+    При jobs > 1 (0 - усі ядра) класи рендеряться частинами у пулі процесів, а результати
+    записуються в основному процесі в тому ж порядку, тому вони не відрізняються від послідовного рендерингу.
+    """
+    if known_tooltips is None:
+        known_tooltips = [None] * len(class_data_list)
+    jobs = jobs if jobs > 0 else os.cpu_count() or 1
+
+    if jobs <= 1 or len(class_data_list) < MIN_PARALLEL_CLASSES:
+        for class_data, tooltips in zip(class_data_list, known_tooltips):
+            if check_cancelled is not None:
+                check_cancelled()
+            render_class(class_data, settings, tooltips)
+        return
+
+    chunk_size = -(-len(class_data_list) // (jobs * CHUNKS_PER_JOB))
+    starts = range(0, len(class_data_list), chunk_size)
+    # spawn однаковий на всіх платформах і безпечний поруч із потоками запису (--pipeline)
+    executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("spawn"))
+    try:
+        results = executor.map(_render_chunk,
+                               [[class_data.get_render_state() for class_data in class_data_list[start:start + chunk_size]] for start in starts],
+                               [known_tooltips[start:start + chunk_size] for start in starts],
+                               [settings] * len(starts))
+        for start, chunk in zip(starts, results):
+            if check_cancelled is not None:
+                check_cancelled()
+            for class_data, rendered in zip(class_data_list[start:start + chunk_size], chunk):
+                rendered.apply(class_data)
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+
+from script_log import logger
+
+
+# Стан зберігається не у вихідній папці (її діаграми комітять у git), а в кеші користувача:
+# окремий файл для кожної вихідної папки. Змінна оточення STATE_DIR_ENV задає іншу папку
+STATE_DIR_ENV = "DRAWIO_UPDATER_STATE_DIR"
+# Файл стану у вихідній папці з попередніх версій: читається, якщо нового стану ще немає, і видаляється при збереженні
+LEGACY_STATE_FILE_NAME = ".drawio-updater-state.json"
+STATE_VERSION = 1
+
+# Оцінка часу обробки на байт XML, поки немає даних попередніх запусків
+DEFAULT_SECONDS_PER_BYTE = 1e-6
+
+def get_state_dir() -> str:
+    """Папка файлів стану: STATE_DIR_ENV або кеш користувача."""
+    path = os.environ.get(STATE_DIR_ENV)
+    if path:
+        return path
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser("~")
+    elif sys.platform == 'darwin':
+        base = os.path.join(os.path.expanduser("~"), "Library", "Caches")
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "drawio-updater")
+
+def get_state_path(output_dir) -> str:
+    """Файл стану для вихідної папки: ім'я папки та контрольна сума її повного шляху."""
+    import zlib
+    output_dir = os.path.normcase(os.path.abspath(output_dir))
+    checksum = zlib.crc32(output_dir.encode('utf-8', 'surrogatepass'))
+    return os.path.join(get_state_dir(), f"{os.path.basename(output_dir) or 'root'}-{checksum:08x}.json")
+
+class RunState:
+    """
+    Стан попередніх запусків для вихідної папки: для кожного вхідного XML - mtime та розмір,
+    скільки тривала його обробка і чи його пропустили через обмеження часу, а для успішно
+    записаних виводів (діаграма, JSON, PlantUML) - їх mtime, розмір та параметри, з якими їх створено.
+    """
+
+    def __init__(self, path : str, output_dir : str = "", legacy_path : str | None = None):
+        self.path = path
+        self.output_dir = output_dir
+        self.legacy_path = legacy_path
+        # Ім'я вхідного файлу -> {'mtime_ns', 'size', 'seconds', 'pending', 'key', 'outputs': {шлях: [mtime_ns, розмір]}}
+        self.files : dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, output_dir) -> "RunState":
+        """Читає стан вихідної папки. Пошкоджений або відсутній файл дає порожній стан."""
+        output_dir = os.path.abspath(output_dir)
+        state = cls(get_state_path(output_dir), output_dir, os.path.join(output_dir, LEGACY_STATE_FILE_NAME))
+        for path in (state.path, state.legacy_path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                # Файл іншої папки з тією ж контрольною сумою не використовуємо
+                if data.get('version') == STATE_VERSION and data.get('output_dir', output_dir) == output_dir:
+                    state.files = data.get('files', {})
+                break
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"Не вдалося прочитати стан {path}: {e}")
+                break
+        return state
+
+    def save(self):
+        from diagram_io import write_diagram_file
+        write_diagram_file(self.path, json.dumps({'version': STATE_VERSION, 'output_dir': self.output_dir, 'files': self.files},
+                                                 ensure_ascii=False, indent=1))
+        if self.legacy_path is not None and os.path.exists(self.legacy_path):
+            os.remove(self.legacy_path)
+
+    def estimate_seconds(self, xml_path, stat : os.stat_result) -> float:
+        """Оцінює час обробки файлу: за попереднім запуском або за розміром файлу."""
+        entry = self.files.get(os.path.basename(xml_path))
+        if entry is not None and entry.get('seconds') is not None:
+            return entry['seconds']
+
+        known = [e for e in self.files.values() if e.get('seconds') is not None and e.get('size')]
+        total_size = sum(e['size'] for e in known)
+        seconds_per_byte = sum(e['seconds'] for e in known) / total_size if total_size else DEFAULT_SECONDS_PER_BYTE
+        return stat.st_size * seconds_per_byte
+
+    def prioritize(self, xml_files : list[str]) -> list[str]:
+        """
+        Впорядковує файли для обробки з обмеженням часу: спершу пропущені минулого разу,
+        далі найновіші за часом зміни, при однаковому часі - найдешевші за оцінкою.
+        """
+        def key(xml_path):
+            try:
+                stat = os.stat(xml_path)
+            except OSError:
+                # Неіснуючий файл обробляємо першим, щоб помилку було видно одразу
+                return (False, 0, 0.0)
+            entry = self.files.get(os.path.basename(xml_path), {})
+            return (not entry.get('pending', False), -stat.st_mtime_ns, self.estimate_seconds(xml_path, stat))
+
+        return sorted(xml_files, key=key)
+
+    def record(self, xml_path, seconds : float | None, pending : bool, output_paths : list[str] | None = None, output_key : str = ""):
+        """
+        Запам'ятовує результат обробки файлу (або те, що його пропущено, якщо pending).
+
+        output_paths передаються лише для успішно записаних виводів (порожній список - успішна обробка
+        без виводів, наприклад, коли всі класи файлу відфільтровано); output_key - параметри, з якими їх створено.
+        """
+        name = os.path.basename(xml_path)
+        entry = self.files.setdefault(name, {})
+        try:
+            stat = os.stat(xml_path)
+            entry['mtime_ns'] = stat.st_mtime_ns
+            entry['size'] = stat.st_size
+        except OSError:
+            pass
+        if seconds is not None:
+            entry['seconds'] = round(seconds, 4)
+        entry['pending'] = pending
+
+        entry.pop('outputs', None)
+        entry.pop('key', None)
+        if output_paths is not None:
+            try:
+                outputs = {}
+                for output_path in output_paths:
+                    stat = os.stat(output_path)
+                    # Повний шлях: стан не залежить від поточної папки запуску
+                    outputs[os.path.abspath(output_path)] = [stat.st_mtime_ns, stat.st_size]
+                entry['outputs'] = outputs
+                entry['key'] = output_key
+            except OSError:
+                pass
+
+    def is_up_to_date(self, xml_files : list[str], output_key : str) -> bool:
+        """
+        Чи всі виводи актуальні: з минулого успішного запуску з тими самими параметрами
+        не змінилися ні XML файли, ні записані файли (наприклад, діаграма після редагування у draw.io).
+        """
+        for xml_path in xml_files:
+            entry = self.files.get(os.path.basename(xml_path))
+            if entry is None or entry.get('pending') or 'outputs' not in entry or entry.get('key') != output_key:
+                return False
+            try:
+                xml_stat = os.stat(xml_path)
+                if [xml_stat.st_mtime_ns, xml_stat.st_size] != [entry.get('mtime_ns'), entry.get('size')]:
+                    return False
+                for output_path, (mtime_ns, size) in entry['outputs'].items():
+                    output_stat = os.stat(output_path)
+                    if (output_stat.st_mtime_ns, output_stat.st_size) != (mtime_ns, size):
+                        return False
+            except OSError:
+                return False
+        return True
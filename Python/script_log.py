@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import os
+
+
+# Ім'я логера скрипта
+LOGGER_NAME = "drawio_updater"
+
+# Файл логу, заданий set_log_file; None - записи не пишуться у файл
+_log_file : str | None = None
+_logger = None
+
+
+def set_log_file(path : str):
+    """
+    Запам'ятовує файл логу. Модуль logging імпортується і налаштовується лише при першому
+    записі, тому запуск, коли нічого не змінилося, не платить за його імпорт і не чіпає файл.
+    """
+    global _log_file, _logger
+    _log_file = os.path.abspath(path)
+    # Логер, створений раніше, буде налаштовано заново при наступному зверненні
+    _logger = None
+
+
+def get_logger():
+    """Повертає логер скрипта (logging.Logger), імпортуючи та налаштовуючи logging при першому виклику."""
+    global _logger
+    if _logger is None:
+        import logging
+        if _log_file is not None:
+            handler = logging.FileHandler(
+                _log_file,
+                mode='w',  # Режим 'w' перезаписує файл при кожному запуску
+                encoding='utf-8',  # Додаємо явне вказання кодування UTF-8
+                delay=True
+            )
+            logging.basicConfig(
+                level=logging.INFO,
+                format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+                handlers=[handler]
+            )
+        _logger = logging.getLogger(LOGGER_NAME)
+        # Без налаштованих обробників (використання як бібліотеки) записи нікуди не виводяться
+        _logger.addHandler(logging.NullHandler())
+    return _logger
+
+
+class DeferredLogger:
+    """Замінник логера для рівня модуля: кожне звернення передається get_logger()."""
+
+    def __getattr__(self, name):
+        return getattr(get_logger(), name)
+
+
+logger = DeferredLogger()
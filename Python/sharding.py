@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+from class_data import ClassData
+
+
+class ClassStub(ClassData):
+    """Невеликий блок-посилання на клас, який розміщено на іншій сторінці діаграми."""
+
+    def __init__(self, target : ClassData, page_name : str):
+        super().__init__(name=target.name, base_class=target.base_class, class_tooltip="")
+        self.target = target
+        self.page_name = page_name
+        self.class_tooltip = f"{target.name}: див. сторінку {page_name}"
+        # Спільні зі справжнім класом, щоб очищення стрілок бачило ті самі зв'язки
+        self.associations = target.associations
+
+    def get_class_full_name(self):
+        return f"{self.name}<br/>→ {self.page_name}"
+
+
+class Shard:
+    """Класи, які потрапляють на одну сторінку діаграми, разом із заглушками для зв'язків з іншими сторінками."""
+
+    def __init__(self, page_name : str):
+        self.page_name = page_name
+        self.classes : list[ClassData] = []
+        self.stubs : list[ClassStub] = []
+
+    def all_classes(self) -> list[ClassData]:
+        return self.classes + self.stubs
+
+
+def namespace_groups(class_data_list : list[ClassData]) -> dict[str, str]:
+    """Групує класи за префіксом простору імен (усе до останньої крапки в імені)."""
+    return {class_data.name: class_data.name.rsplit('.', 1)[0] if '.' in class_data.name else ""
+            for class_data in class_data_list}
+
+
+def component_groups(class_data_list : list[ClassData]) -> dict[str, str]:
+    """
+    Групує класи за компонентами зв'язності графа наслідування та асоціацій.
+
+    Ключ групи - найменше ім'я класу в компоненті, тому він не залежить від порядку вхідних даних.
+    """
+    parents = {class_data.name: class_data.name for class_data in class_data_list}
+
+    def find(name):
+        while parents[name] != name:
+            parents[name] = parents[parents[name]]
+            name = parents[name]
+        return name
+
+    def union(a, b):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # Коренем стає менше ім'я - це і є ключ групи
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            parents[root_b] = root_a
+
+    for class_data in class_data_list:
+        if class_data.base_class in parents:
+            union(class_data.name, class_data.base_class)
+        for target in class_data.associations:
+            if target.name in parents:
+                union(class_data.name, target.name)
+
+    return {name: find(name) for name in parents}
+
+
+def plan_shards(class_data_list : list[ClassData], max_per_page : int, class_pages : dict[str, str],
+                page_names : list[str], shard_by : str = "component") -> list[Shard]:
+    """
+    Розподіляє класи по сторінках так, щоб на кожній було не більше max_per_page класів.
+
+    Розподіл стабільний між запусками: клас залишається на сторінці, де він уже є (class_pages),
+    поки там є місце, а нові класи йдуть на сторінку, де вже лежить більшість їх групи.
+
+    Args:
+        class_data_list: Усі класи вхідного файлу.
+        max_per_page: Максимальна кількість класів на сторінці.
+        class_pages: label класу -> сторінка, на якій він уже розміщений.
+        page_names: Імена всіх сторінок у файлі.
+        shard_by: "component" або "namespace".
+
+    Returns:
+        list[Shard]: Сторінки з класами у порядку сторінок у файлі.
+    """
+    groups = namespace_groups(class_data_list) if shard_by == "namespace" else component_groups(class_data_list)
+    order = {class_data.name: index for index, class_data in enumerate(class_data_list)}
+
+    # Сторінки, на яких уже є класи, зберігають свій порядок у файлі
+    pages : dict[str, list[ClassData]] = {}
+    for page_name in page_names:
+        if page_name in class_pages.values():
+            pages[page_name] = []
+
+    def new_page() -> str:
+        # Порожні сторінки з такими іменами (наприклад, Page-1 нової діаграми) використовуємо повторно
+        number = 1
+        while f"Page-{number}" in pages:
+            number += 1
+        pages[f"Page-{number}"] = []
+        return f"Page-{number}"
+
+    # Спершу залишаємо класи там, де вони вже є
+    assigned : dict[str, str] = {}
+    unassigned : dict[str, list[ClassData]] = {}
+    for class_data in sorted(class_data_list, key=lambda c: c.name):
+        page_name = class_pages.get(class_data.get_class_full_name())
+        if page_name in pages and len(pages[page_name]) < max_per_page:
+            pages[page_name].append(class_data)
+            assigned[class_data.name] = page_name
+        else:
+            unassigned.setdefault(groups[class_data.name], []).append(class_data)
+
+    # Нові класи - на сторінку, де вже лежить більшість їх групи, інакше на першу з вільним місцем
+    group_pages = Counter((groups[name], page_name) for name, page_name in assigned.items())
+    for group in sorted(unassigned):
+        page_order = list(pages)
+        candidates = sorted(page_order, key=lambda p: (-group_pages[(group, p)], page_order.index(p)))
+        for class_data in unassigned[group]:
+            page_name = next((p for p in candidates if len(pages[p]) < max_per_page), None)
+            if page_name is None:
+                page_name = new_page()
+                candidates.append(page_name)
+            pages[page_name].append(class_data)
+            assigned[class_data.name] = page_name
+
+    shards = []
+    for page_name, classes in pages.items():
+        shard = Shard(page_name)
+        shard.classes = sorted(classes, key=lambda c: order[c.name])
+        shards.append(shard)
+
+    _add_stubs(shards, assigned)
+    return shards
+
+
+def _add_stubs(shards : list[Shard], assigned : dict[str, str]):
+    """Додає на кожну сторінку заглушки для класів з інших сторінок, з якими є зв'язки."""
+    by_name = {class_data.name: class_data for shard in shards for class_data in shard.classes}
+
+    for shard in shards:
+        needed : dict[str, ClassData] = {}
+        for class_data in shard.classes:
+            # Вихідні зв'язки: базовий клас та асоціації
+            related = [by_name.get(class_data.base_class)] + class_data.associations
+            for target in related:
+                if target is not None and target.name in assigned and assigned[target.name] != shard.page_name:
+                    needed[target.name] = target
+
+        # Вхідні зв'язки: класи з інших сторінок, які посилаються на класи цієї сторінки
+        names_on_page = {class_data.name for class_data in shard.classes}
+        for source in by_name.values():
+            if assigned[source.name] == shard.page_name:
+                continue
+            if source.base_class in names_on_page or any(t.name in names_on_page for t in source.associations):
+                needed[source.name] = source
+
+        shard.stubs = [ClassStub(target, assigned[target.name]) for target in sorted(needed.values(), key=lambda c: c.name)]
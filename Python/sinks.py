@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import re
+from typing import Callable
+
+from class_data import ClassData
+
+
+# Основний вивід - оновлення діаграми drawio (див. generate_uml.create_uml_diagram)
+SINK_DRAWIO = "drawio"
+SINK_JSON = "json"
+SINK_PLANTUML = "plantuml"
+
+
+def plain(text : str | None) -> str | None:
+    """Повертає текст без HTML-екранування, яке ClassData додає для діаграми."""
+    if text is None:
+        return None
+    return text.replace("&lt;", "<").replace("&gt;", ">")
+
+
+def relations(class_data_list : list[ClassData]) -> tuple[list[tuple[str, str]], list[tuple[str, str]]]:
+    """Зв'язки між класами файлу: (клас, базовий клас) та (клас, асоційований клас) у порядку класів."""
+    names = {class_data.name for class_data in class_data_list}
+    extends = [(class_data.name, class_data.base_class) for class_data in class_data_list if class_data.base_class in names]
+    associations = [(class_data.name, target.name) for class_data in class_data_list for target in class_data.associations]
+    return extends, associations
+
+
+def render_json_graph(class_data_list : list[ClassData], source_name : str) -> str:
+    """Граф класів у JSON: класи з полями, методами та підказками, а також зв'язки між ними."""
+    extends, associations = relations(class_data_list)
+    graph = {
+        'source': source_name,
+        'classes': [{
+            'name': plain(class_data.name),
+            'base': class_data.base_class,
+            'tooltip': class_data.raw_class_tooltip,
+            'fields': [{'value': plain(field), 'name': plain(short_field), 'tooltip': tooltip}
+                       for field, short_field, tooltip in class_data.field_items],
+            'methods': [{'value': plain(method), 'tooltip': tooltip} for method, tooltip in class_data.method_items],
+            'associations': [plain(target.name) for target in class_data.associations],
+            'external_associations': [plain(name) for name in class_data.external_associations],
+        } for class_data in class_data_list],
+        'relations': [{'kind': "extends", 'source': plain(source), 'target': plain(target)} for source, target in extends] +
+                     [{'kind': "association", 'source': plain(source), 'target': plain(target)} for source, target in associations],
+    }
+    return json.dumps(graph, ensure_ascii=False, indent=1)
+
+
+def render_plantuml(class_data_list : list[ClassData], source_name : str) -> str:
+    """Діаграма класів PlantUML; двосторонні асоціації показуються однією стрілкою <-->."""
+    aliases : dict[str, str] = {}
+    for class_data in class_data_list:
+        aliases.setdefault(class_data.name, re.sub(r'\W', '_', plain(class_data.name)))
+
+    lines = [f"@startuml {os.path.splitext(source_name)[0]}"]
+    for class_data in class_data_list:
+        members = [plain(field) for field, _, _ in class_data.field_items] + [plain(method) for method, _ in class_data.method_items]
+        header = f'class "{plain(class_data.name)}" as {aliases[class_data.name]}'
+        if members:
+            lines.append(header + " {")
+            lines.extend(f"  {member}" for member in members)
+            lines.append("}")
+        else:
+            lines.append(header)
+
+    extends, associations = relations(class_data_list)
+    for source, target in extends:
+        lines.append(f"{aliases[target]} <|-- {aliases[source]}")
+    pairs = set(associations)
+    for source, target in associations:
+        if (target, source) not in pairs:
+            lines.append(f"{aliases[source]} --> {aliases[target]}")
+        elif source <= target:
+            lines.append(f"{aliases[source]} <--> {aliases[target]}")
+    lines.append("@enduml")
+    return "\n".join(lines) + "\n"
+
+
+# Додаткові виводи: назва -> (розширення файлу, функція, що повертає його вміст)
+EXPORT_SINKS : dict[str, tuple[str, Callable[[list[ClassData], str], str]]] = {
+    SINK_JSON: (".json", render_json_graph),
+    SINK_PLANTUML: (".puml", render_plantuml),
+}
+
+
+def get_export_path(xml_path, output_dir, sink : str) -> str:
+    """Повертає шлях до файлу додаткового виводу для вхідного XML."""
+    file_name_without_ext = os.path.splitext(os.path.basename(xml_path))[0]
+    return os.path.abspath(os.path.join(output_dir, f"{file_name_without_ext}{EXPORT_SINKS[sink][0]}"))
+
+
+def render_export(sink : str, class_data_list : list[ClassData], xml_path) -> str:
+    """Повертає вміст додаткового виводу; асоціації вже мають бути знайдені."""
+    return EXPORT_SINKS[sink][1](class_data_list, os.path.basename(xml_path))
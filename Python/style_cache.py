@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import sys
+from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+
+class CellKind(Enum):
+    """Вид елемента діаграми за його стилем."""
+    CLASS = "class"
+    SEPARATOR = "separator"
+    ASSOCIATION = "association"
+    DOUBLE_ASSOCIATION = "double_association"
+    EXTENDS = "extends"
+    # Будь-яка інша стрілка (наприклад, намальована користувачем)
+    EDGE = "edge"
+    OTHER = "other"
+
+
+class ParsedStyle(NamedTuple):
+    """Розібраний стиль draw.io: вид елемента, значення ключів та імена стилів без значень (наприклад, "line")."""
+    kind : CellKind
+    values : Mapping[str, str]
+    names : tuple[str, ...]
+
+    @property
+    def is_edge(self) -> bool:
+        """Чи це стиль стрілки (є хоча б один з ключів endArrow/startArrow)."""
+        return 'endArrow' in self.values or 'startArrow' in self.values
+
+
+def intern_style(style : str) -> str:
+    """Повертає один спільний екземпляр рядка стилю для всіх комірок з однаковим стилем."""
+    return sys.intern(style)
+
+
+# Скільки різних стилів тримати у кеші. Діаграма зазвичай має кілька десятків різних стилів;
+# обмеження потрібне, щоб процес, який оновлює багато діаграм (update_diagrams), не накопичував
+# стилі всіх діаграм (рядки з sys.intern звільняються, коли на них більше немає посилань)
+STYLE_CACHE_SIZE = 1024
+
+
+@lru_cache(maxsize=STYLE_CACHE_SIZE)
+def parse_style(style : str | None) -> ParsedStyle:
+    """
+    Розбирає рядок стилю один раз для кожного різного значення.
+
+    Вид визначається за ключами, а не за точним збігом рядка, тому додані користувачем ключі
+    (колір, товщина лінії) не змінюють вид елемента.
+    """
+    values = {}
+    names = []
+    for token in (style or "").split(';'):
+        if not token:
+            continue
+        if '=' in token:
+            key, value = token.split('=', 1)
+            values[sys.intern(key)] = sys.intern(value)
+        else:
+            names.append(sys.intern(token))
+
+    return ParsedStyle(_classify(values, names), MappingProxyType(values), tuple(names))
+
+
+def _classify(values : dict[str, str], names : list[str]) -> CellKind:
+    if values.get('childLayout') == "stackLayout":
+        return CellKind.CLASS
+    if names[:1] == ["line"]:
+        return CellKind.SEPARATOR
+
+    end_arrow = values.get('endArrow')
+    start_arrow = values.get('startArrow')
+    if end_arrow is None and start_arrow is None:
+        return CellKind.OTHER
+    if end_arrow == "block" and values.get('endFill') == "0":
+        return CellKind.EXTENDS
+    # Асоціації скрипта - криві зі стрілкою classic; звичайні стрілки користувача не чіпаємо
+    if values.get('curved') == "1" and end_arrow == "classic":
+        if start_arrow == "classic":
+            return CellKind.DOUBLE_ASSOCIATION
+        if start_arrow in (None, "none"):
+            return CellKind.ASSOCIATION
+    return CellKind.EDGE
+
+
+def style_kind(style : str | None) -> CellKind:
+    """Вид елемента за рядком стилю (з кешу)."""
+    return parse_style(style).kind
+
+
+def update_style(style : str, **values : str | None) -> str:
+    """Змінює значення ключів стилю, зберігаючи решту ключів та їх порядок. None видаляє ключ."""
+    tokens = []
+    for token in style.split(';'):
+        if not token:
+            continue
+        key = token.split('=', 1)[0]
+        if '=' in token and key in values:
+            value = values.pop(key)
+            if value is not None:
+                tokens.append(f"{key}={value}")
+        else:
+            tokens.append(token)
+    tokens.extend(f"{key}={value}" for key, value in values.items() if value is not None)
+    return intern_style(";".join(tokens) + ";")
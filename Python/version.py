@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Версії окремим модулем: їх читає швидка перевірка "змін немає", якій не потрібні модулі діаграм
+
+# Формат збережених діаграм: діаграми без цієї позначки мігруються (див. DiagramManager.megrate_to_user_object)
+FORMAT_VERSION = "1"
+
+# Ревізія генератора. Збільшуйте її, коли для тих самих вхідних даних змінюється вивід
+# (розміщення, стилі, підказки), щоб наступний запуск оновив навіть незмінені діаграми
+GENERATOR_REVISION = 1